@@ -1,5 +1,7 @@
 """统计分析模块"""
 
+import bottleneck as bn
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
@@ -66,14 +68,44 @@ class StatisticsAnalyzer:
         # 优先使用日期范围过滤
         if date_range is not None:
             start_date, end_date = date_range
-            return df[(df["时间"] >= start_date) & (df["时间"] <= end_date)].copy()
+            return self._slice_time_range(df, start_date, end_date)
 
-        # 按年份过滤
+        # 按年份过滤：[当年 1 月 1 日, 次年 1 月 1 日)
         if year is not None:
-            return df[df["时间"].dt.year == year].copy()
+            return self._slice_time_range(
+                df, datetime(year, 1, 1), datetime(year + 1, 1, 1), include_end=False
+            )
 
-        # 返回所有数据
-        return df.copy()
+        # 返回所有数据（分析过程只读，无需复制）
+        return df
+
+    def _slice_time_range(
+        self, df: pd.DataFrame, start_time, end_time, include_end: bool = True
+    ) -> pd.DataFrame:
+        """
+        按时间范围截取数据
+
+        数据已按时间升序排列时（如 _load_all_bills 的输出），用二分查找定位边界并按位置切片，
+        否则退回布尔掩码过滤
+
+        Args:
+            df: 交易数据
+            start_time: 开始时间（包含）
+            end_time: 结束时间
+            include_end: 是否包含结束时间
+
+        Returns:
+            时间范围内的数据
+        """
+        times = df["时间"]
+
+        if times.is_monotonic_increasing:
+            lo = times.searchsorted(start_time, side="left")
+            hi = times.searchsorted(end_time, side="right" if include_end else "left")
+            return df.iloc[lo:hi]
+
+        end_mask = times <= end_time if include_end else times < end_time
+        return df[(times >= start_time) & end_mask]
 
     def _empty_result(self) -> Dict:
         """返回空结果"""
@@ -94,10 +126,15 @@ class StatisticsAnalyzer:
     def _generate_summary(self, df: pd.DataFrame) -> Dict:
         """生成摘要统计"""
         total_transactions = len(df)
-        total_amount = df["金额"].sum()
-        average_amount = df["金额"].mean() if total_transactions > 0 else 0
-        min_time = df["时间"].min()
-        max_time = df["时间"].max()
+
+        # 一次 agg 调用完成金额（按分计）与时间的全部归约
+        stats = pd.DataFrame({"金额": self._to_cents(df["金额"]), "时间": df["时间"]}).agg(
+            {"金额": ["sum", "mean"], "时间": ["min", "max"]}
+        )
+        total_amount = stats.at["sum", "金额"] / 100
+        average_amount = stats.at["mean", "金额"] / 100 if total_transactions > 0 else 0
+        min_time = stats.at["min", "时间"]
+        max_time = stats.at["max", "时间"]
 
         return {
             "total_transactions": total_transactions,
@@ -106,95 +143,128 @@ class StatisticsAnalyzer:
             "date_range": (min_time, max_time),
         }
 
-    def _analyze_by_platform(self, df: pd.DataFrame) -> Dict:
-        """按平台分析"""
-        platform_stats = (
-            df.groupby("平台")
-            .agg({"金额": ["count", "sum"]})
-            .reset_index()
+    def _to_cents(self, amounts: pd.Series) -> pd.Series:
+        """
+        将金额（元）转换为整数分
+
+        以取整后的浮点数保存：2^53 以内的整数相加没有舍入误差，求和结果精确，
+        同时保留缺失值（int64 无法表示 NaN）。结果除以 100 即还原为元
+        """
+        return (amounts * 100).round()
+
+    def _agg_group(
+        self, df: pd.DataFrame, key, with_mean: bool = False, sort: bool = True
+    ) -> pd.DataFrame:
+        """
+        按指定键对金额做单次分组聚合
+
+        使用具名聚合直接得到扁平列名，避免 MultiIndex 列的展开与重命名
+
+        Args:
+            df: 交易数据
+            key: 分组键（列名或与 df 对齐的 Series）
+            with_mean: 是否同时计算平均金额
+            sort: 是否按分组键排序（结果随后会重新排序时可关闭）
+
+        Returns:
+            以分组键为索引、包含"交易次数"/"总金额"（/"平均金额"）列的 DataFrame
+        """
+        keys = df[key] if isinstance(key, str) else key
+
+        aggregations = {"交易次数": "count", "总金额": "sum"}
+        if with_mean:
+            aggregations["平均金额"] = "mean"
+
+        # 按整数分累加，避免浮点求和误差
+        stats = (
+            self._to_cents(df["金额"])
+            .groupby(keys, sort=sort, observed=True)
+            .agg(**aggregations)
         )
+        amount_columns = [col for col in stats.columns if col != "交易次数"]
+        stats[amount_columns] = stats[amount_columns] / 100
 
-        platform_stats.columns = ["平台", "交易次数", "总金额"]
+        return stats
 
-        result = {}
-        for _, row in platform_stats.iterrows():
-            result[row["平台"]] = {
-                "count": int(row["交易次数"]),
-                "amount": abs(float(row["总金额"])),
-            }
+    def _analyze_by_platform(self, df: pd.DataFrame) -> Dict:
+        """按平台分析"""
+        platform_stats = self._agg_group(df, "平台")
+
+        result = {
+            platform: {"count": int(count), "amount": abs(float(amount))}
+            for platform, count, amount in zip(
+                platform_stats.index.to_numpy(),
+                platform_stats["交易次数"].to_numpy(),
+                platform_stats["总金额"].to_numpy(),
+            )
+        }
 
         return result
 
     def _analyze_by_category(self, df: pd.DataFrame) -> Dict:
         """按分类分析"""
-        category_stats = (
-            df.groupby("分类")
-            .agg({"金额": ["count", "sum", "mean"]})
-            .reset_index()
-        )
-
-        category_stats.columns = ["分类", "交易次数", "总金额", "平均金额"]
+        category_stats = self._agg_group(df, "分类", with_mean=True, sort=False)
 
         # 按总金额降序排序
-        category_stats = category_stats.sort_values("总金额", ascending=False)
-
-        result = {}
-        for _, row in category_stats.iterrows():
-            result[row["分类"]] = {
-                "count": int(row["交易次数"]),
-                "amount": abs(float(row["总金额"])),
-                "average": abs(float(row["平均金额"])),
+        category_stats = category_stats.sort_values("总金额", ascending=False, kind="stable")
+
+        result = {
+            category: {
+                "count": int(count),
+                "amount": abs(float(amount)),
+                "average": abs(float(average)),
             }
+            for category, count, amount, average in zip(
+                category_stats.index.to_numpy(),
+                category_stats["交易次数"].to_numpy(),
+                category_stats["总金额"].to_numpy(),
+                category_stats["平均金额"].to_numpy(),
+            )
+        }
 
         return result
 
     def _analyze_by_month(self, df: pd.DataFrame) -> Dict:
         """按月分析"""
-        df_copy = df.copy()
-        df_copy["年月"] = df_copy["时间"].dt.to_period("M")
+        month_stats = self._agg_group(df, df["时间"].dt.to_period("M"))
 
-        month_stats = (
-            df_copy.groupby("年月")
-            .agg({"金额": ["count", "sum"]})
-            .reset_index()
-        )
-
-        month_stats.columns = ["年月", "交易次数", "总金额"]
-
-        result = {}
-        for _, row in month_stats.iterrows():
-            period = row["年月"]
-            key = f"{period.year}-{period.month:02d}"
-            result[key] = {
-                "year": period.year,
-                "month": period.month,
-                "count": int(row["交易次数"]),
-                "amount": abs(float(row["总金额"])),
+        # 键与年、月直接从 PeriodIndex 整列生成
+        periods = month_stats.index
+        result = {
+            key: {
+                "year": int(year),
+                "month": int(month),
+                "count": int(count),
+                "amount": abs(float(amount)),
             }
+            for key, year, month, count, amount in zip(
+                periods.strftime("%Y-%m"),
+                periods.year,
+                periods.month,
+                month_stats["交易次数"].to_numpy(),
+                month_stats["总金额"].to_numpy(),
+            )
+        }
 
         return result
 
     def _get_top_merchants(self, df: pd.DataFrame, top_n: int = 20) -> List[Dict]:
         """获取消费最多的商户"""
-        merchant_stats = (
-            df.groupby("对方")
-            .agg({"金额": ["count", "sum"]})
-            .reset_index()
-        )
-
-        merchant_stats.columns = ["商户", "交易次数", "总金额"]
+        merchant_stats = self._agg_group(df, "对方", sort=False)
 
         merchant_stats["总金额"] = merchant_stats["总金额"].abs()
 
-        merchant_stats = merchant_stats.sort_values("总金额", ascending=False).head(top_n)
+        # 只需前 top_n 个，部分排序即可
+        merchant_stats = merchant_stats.nlargest(top_n, "总金额")
 
-        result = []
-        for _, row in merchant_stats.iterrows():
-            result.append({
-                "merchant": row["商户"],
-                "count": int(row["交易次数"]),
-                "amount": float(row["总金额"]),
-            })
+        result = [
+            {"merchant": merchant, "count": int(count), "amount": float(amount)}
+            for merchant, count, amount in zip(
+                merchant_stats.index.to_numpy(),
+                merchant_stats["交易次数"].to_numpy(),
+                merchant_stats["总金额"].to_numpy(),
+            )
+        ]
 
         return result
 
@@ -214,27 +284,25 @@ class StatisticsAnalyzer:
         if df.empty:
             return []
 
-        mean_amount = df["金额"].abs().mean()
-        std_amount = df["金额"].abs().std()
-        threshold = mean_amount + (std_amount * threshold_multiplier)
+        # 金额绝对值只计算一次，供均值、标准差和筛选共用
+        amount_abs = np.abs(df["金额"].to_numpy(dtype=float))
 
-        anomalies = df[df["金额"].abs() > threshold].copy()
+        # bottleneck 的 nan* 归约在 C 中单次遍历完成，且与 pandas 一样跳过缺失值
+        mean_amount = bn.nanmean(amount_abs)
+        std_amount = bn.nanstd(amount_abs, ddof=1)
+        threshold = mean_amount + (std_amount * threshold_multiplier)
 
-        result = []
-        for _, row in anomalies.iterrows():
-            result.append({
-                "时间": row["时间"],
-                "金额": abs(float(row["金额"])),
-                "对方": row["对方"],
-                "分类": row["分类"],
-                "平台": row["平台"],
-                "原始描述": row.get("原始描述", ""),
-            })
+        mask = amount_abs > threshold
+        anomalies = df[mask]
+        anomalies = anomalies.assign(
+            金额=amount_abs[mask],
+            原始描述=anomalies["原始描述"] if "原始描述" in anomalies.columns else "",
+        )
 
-        # 按金额降序排序
-        result.sort(key=lambda x: x["金额"], reverse=True)
+        # 按金额降序排序（稳定排序，与原始顺序保持一致）
+        anomalies = anomalies.sort_values("金额", ascending=False, kind="stable")
 
-        return result
+        return anomalies[["时间", "金额", "对方", "分类", "平台", "原始描述"]].to_dict("records")
 
     def compare_periods(
         self, df: pd.DataFrame, period1: Tuple, period2: Tuple
@@ -251,11 +319,11 @@ class StatisticsAnalyzer:
             比较结果
         """
         # 过滤两个时间段的数据
-        df1 = df[(df["时间"] >= period1[0]) & (df["时间"] <= period1[1])]
-        df2 = df[(df["时间"] >= period2[0]) & (df["时间"] <= period2[1])]
+        df1 = self._slice_time_range(df, period1[0], period1[1])
+        df2 = self._slice_time_range(df, period2[0], period2[1])
 
-        amount1 = df1["金额"].sum()
-        amount2 = df2["金额"].sum()
+        amount1 = self._to_cents(df1["金额"]).sum() / 100
+        amount2 = self._to_cents(df2["金额"]).sum() / 100
         count1 = len(df1)
         count2 = len(df2)
 
@@ -292,26 +360,23 @@ class StatisticsAnalyzer:
         Returns:
             每日消费模式
         """
-        df_copy = df.copy()
-        df_copy["日期"] = df_copy["时间"].dt.date
-        df_copy["星期"] = df_copy["时间"].dt.dayofweek
-
         # 按星期统计
-        weekday_stats = (
-            df_copy.groupby("星期")
-            .agg({"金额": ["count", "sum"]})
-            .reset_index()
-        )
+        weekday_stats = self._agg_group(df, df["时间"].dt.dayofweek.rename("星期"))
 
         weekday_names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
 
-        result = {}
-        for _, row in weekday_stats.iterrows():
-            weekday = int(row["星期"])
-            result[weekday] = {
+        # 时间含 NaT 时星期键为浮点型，统一转为 int
+        result = {
+            weekday: {
                 "name": weekday_names[weekday],
-                "count": int(row[("金额", "count")]),
-                "amount": abs(float(row[("金额", "sum")])),
+                "count": int(count),
+                "amount": abs(float(amount)),
             }
+            for weekday, count, amount in zip(
+                weekday_stats.index.astype(int).tolist(),
+                weekday_stats["交易次数"].to_numpy(),
+                weekday_stats["总金额"].to_numpy(),
+            )
+        }
 
         return result
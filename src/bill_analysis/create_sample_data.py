@@ -14,63 +14,81 @@ if sys.platform == "win32":
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 
 
+def _sample_transactions(rng, n: int, specs: dict, start_date: datetime, days: int):
+    """
+    按分类规格批量生成交易（一次性向量化采样，不逐条循环）
+
+    Args:
+        rng: numpy 随机数生成器
+        n: 交易笔数
+        specs: {分类: ((最小金额, 最大金额), [商户, ...])}
+        start_date: 起始日期
+        days: 日期跨度（天）
+
+    Returns:
+        (交易时间, 分类, 商户, 金额) 四个等长数组
+    """
+    categories = list(specs)
+    category_idx = rng.integers(0, len(categories), n)
+
+    # 根据分类设置金额范围
+    bounds = np.array([specs[c][0] for c in categories], dtype=float)
+    amounts = rng.uniform(bounds[category_idx, 0], bounds[category_idx, 1])
+
+    # 在各自分类的商户列表中均匀抽取：所有商户拼成一个数组，按分类偏移取值
+    merchant_counts = np.array([len(specs[c][1]) for c in categories])
+    merchant_offsets = np.concatenate([[0], np.cumsum(merchant_counts)[:-1]])
+    all_merchants = np.array([m for c in categories for m in specs[c][1]])
+    merchant_idx = merchant_offsets[category_idx] + rng.integers(
+        0, merchant_counts[category_idx]
+    )
+
+    times = (
+        pd.Timestamp(start_date)
+        + pd.to_timedelta(rng.integers(0, days, n), unit="D")
+        + pd.to_timedelta(rng.integers(8, 22, n), unit="h")
+    )
+
+    return times, np.array(categories)[category_idx], all_merchants[merchant_idx], amounts
+
+
 def create_sample_alipay():
     """创建示例支付宝账单"""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
 
     # 生成2024年的数据
     start_date = datetime(2024, 1, 1)
     end_date = datetime(2024, 12, 31)
     days = (end_date - start_date).days
 
-    data = []
-    categories = ["餐饮美食", "购物消费", "交通出行", "休闲娱乐", "医疗健康", "教育培训"]
-
-    for i in range(500):
-        # 随机日期
-        random_days = np.random.randint(0, days)
-        transaction_time = start_date + timedelta(days=random_days, hours=np.random.randint(8, 22))
-
-        # 随机分类
-        category = np.random.choice(categories)
-
-        # 根据分类设置金额范围
-        if category == "餐饮美食":
-            amount = np.random.uniform(20, 200)
-            merchants = ["肯德基", "麦当劳", "星巴克", "美团外卖", "饿了么", "真功夫"]
-        elif category == "购物消费":
-            amount = np.random.uniform(50, 500)
-            merchants = ["淘宝", "京东", "天猫", "拼多多", "苏宁", "优衣库"]
-        elif category == "交通出行":
-            amount = np.random.uniform(5, 100)
-            merchants = ["滴滴出行", "地铁", "公交", "共享单车", "加油站", "停车场"]
-        elif category == "休闲娱乐":
-            amount = np.random.uniform(30, 300)
-            merchants = ["爱奇艺", "腾讯视频", "Steam", "电影院", "KTV", "健身房"]
-        elif category == "医疗健康":
-            amount = np.random.uniform(50, 500)
-            merchants = ["医院", "药店", "诊所", "体检中心"]
-        else:
-            amount = np.random.uniform(100, 1000)
-            merchants = ["在线教育", "培训机构", "书店", "知识付费"]
-
-        merchant = np.random.choice(merchants)
-
-        data.append({
-            "付款时间": transaction_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "交易分类": category,
-            "交易对方": merchant,
-            "商品说明": f"{merchant}消费",
-            "金额（元）": -round(amount, 2),
+    specs = {
+        "餐饮美食": ((20, 200), ["肯德基", "麦当劳", "星巴克", "美团外卖", "饿了么", "真功夫"]),
+        "购物消费": ((50, 500), ["淘宝", "京东", "天猫", "拼多多", "苏宁", "优衣库"]),
+        "交通出行": ((5, 100), ["滴滴出行", "地铁", "公交", "共享单车", "加油站", "停车场"]),
+        "休闲娱乐": ((30, 300), ["爱奇艺", "腾讯视频", "Steam", "电影院", "KTV", "健身房"]),
+        "医疗健康": ((50, 500), ["医院", "药店", "诊所", "体检中心"]),
+        "教育培训": ((100, 1000), ["在线教育", "培训机构", "书店", "知识付费"]),
+    }
+
+    times, categories, merchants, amounts = _sample_transactions(
+        rng, 500, specs, start_date, days
+    )
+
+    df = pd.DataFrame(
+        {
+            "付款时间": times.strftime("%Y-%m-%d %H:%M:%S"),
+            "交易分类": categories,
+            "交易对方": merchants,
+            "商品说明": np.char.add(merchants, "消费"),
+            "金额（元）": -np.round(amounts, 2),
             "收/支": "支出",
             "交易状态": "交易成功",
-        })
-
-    df = pd.DataFrame(data)
+        }
+    )
     df = df.sort_values("付款时间").reset_index(drop=True)
 
     return df
@@ -78,51 +96,34 @@ def create_sample_alipay():
 
 def create_sample_wechat():
     """创建示例微信账单"""
-    np.random.seed(43)
+    rng = np.random.default_rng(43)
 
     # 生成2024年的数据
     start_date = datetime(2024, 1, 1)
     end_date = datetime(2024, 12, 31)
     days = (end_date - start_date).days
 
-    data = []
-    categories = ["餐饮", "购物", "交通", "娱乐", "医疗"]
-
-    for i in range(400):
-        random_days = np.random.randint(0, days)
-        transaction_time = start_date + timedelta(days=random_days, hours=np.random.randint(8, 22))
-
-        category = np.random.choice(categories)
-
-        if category == "餐饮":
-            amount = np.random.uniform(20, 150)
-            merchants = ["瑞幸咖啡", "喜茶", "海底捞", "西贝", "外卖"]
-        elif category == "购物":
-            amount = np.random.uniform(50, 400)
-            merchants = ["京东", "拼多多", "超市", "便利店"]
-        elif category == "交通":
-            amount = np.random.uniform(3, 80)
-            merchants = ["滴滴", "地铁", "停车费", "加油"]
-        elif category == "娱乐":
-            amount = np.random.uniform(30, 200)
-            merchants = ["视频会员", "游戏充值", "电影院"]
-        else:
-            amount = np.random.uniform(50, 400)
-            merchants = ["医院", "药店"]
-
-        merchant = np.random.choice(merchants)
-
-        data.append({
-            "交易时间": transaction_time.strftime("%Y-%m-%d %H:%M:%S"),
+    specs = {
+        "餐饮": ((20, 150), ["瑞幸咖啡", "喜茶", "海底捞", "西贝", "外卖"]),
+        "购物": ((50, 400), ["京东", "拼多多", "超市", "便利店"]),
+        "交通": ((3, 80), ["滴滴", "地铁", "停车费", "加油"]),
+        "娱乐": ((30, 200), ["视频会员", "游戏充值", "电影院"]),
+        "医疗": ((50, 400), ["医院", "药店"]),
+    }
+
+    times, _, merchants, amounts = _sample_transactions(rng, 400, specs, start_date, days)
+
+    df = pd.DataFrame(
+        {
+            "交易时间": times.strftime("%Y-%m-%d %H:%M:%S"),
             "交易类型": "消费",
-            "交易对方": merchant,
-            "商品说明": f"{merchant}消费",
-            "金额（元）": -round(amount, 2),
+            "交易对方": merchants,
+            "商品说明": np.char.add(merchants, "消费"),
+            "金额（元）": -np.round(amounts, 2),
             "收/支": "支出",
             "交易状态": "支付成功",
-        })
-
-    df = pd.DataFrame(data)
+        }
+    )
     df = df.sort_values("交易时间").reset_index(drop=True)
 
     return df
@@ -130,39 +131,44 @@ def create_sample_wechat():
 
 def create_sample_ccb():
     """创建示例建设银行账单"""
-    np.random.seed(44)
+    rng = np.random.default_rng(44)
 
     # 生成2024年的数据
     start_date = datetime(2024, 1, 1)
     end_date = datetime(2024, 12, 31)
     days = (end_date - start_date).days
 
-    data = []
-
     # 银行卡消费（较少，主要用于大额消费）
-    for i in range(100):
-        random_days = np.random.randint(0, days)
-        transaction_time = start_date + timedelta(days=random_days)
-
-        amount = np.random.uniform(100, 2000)
-
-        merchants = ["超市", "电器城", "加油站", "酒店", "餐厅"]
-        merchant = np.random.choice(merchants)
-
-        data.append({
-            "交易时间": transaction_time.strftime("%Y-%m-%d"),
-            "交易金额": -round(amount, 2),
+    n = 100
+    merchants = np.array(["超市", "电器城", "加油站", "酒店", "餐厅"])
+    merchant = merchants[rng.integers(0, len(merchants), n)]
+    times = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days, n), unit="D")
+    amounts = rng.uniform(100, 2000, n)
+
+    df = pd.DataFrame(
+        {
+            "交易时间": times.strftime("%Y-%m-%d"),
+            "交易金额": -np.round(amounts, 2),
             "交易对方": merchant,
             "交易类型": "消费",
-            "商品": merchant + "消费",
-        })
-
-    df = pd.DataFrame(data)
+            "商品": np.char.add(merchant, "消费"),
+        }
+    )
     df = df.sort_values("交易时间").reset_index(drop=True)
 
     return df
 
 
+def _write_excel(df: pd.DataFrame, path: str):
+    """
+    写出 Excel 文件
+
+    使用 xlsxwriter 引擎（比默认的 openpyxl 快）。注意不能开启其 constant_memory 模式：
+    pandas 按列写入单元格，而该模式只接受按行顺序写入，会静默丢弃数据
+    """
+    df.to_excel(path, index=False, engine="xlsxwriter")
+
+
 def main():
     """生成所有示例数据"""
     print("正在生成示例账单数据...")
@@ -182,14 +188,14 @@ def main():
     print("  → 生成微信账单...")
     wechat_df = create_sample_wechat()
     wechat_path = os.path.join(input_dir, "wechat_2024.xlsx")
-    wechat_df.to_excel(wechat_path, index=False)
+    _write_excel(wechat_df, wechat_path)
     print(f"    已保存: {wechat_path} ({len(wechat_df)} 条记录)")
 
     # 生成建设银行账单
     print("  → 生成建设银行账单...")
     ccb_df = create_sample_ccb()
     ccb_path = os.path.join(input_dir, "ccb.xls")
-    ccb_df.to_excel(ccb_path, index=False)
+    _write_excel(ccb_df, ccb_path)
     print(f"    已保存: {ccb_path} ({len(ccb_df)} 条记录)")
 
     print("\n✓ 示例数据生成完成！")
@@ -0,0 +1,76 @@
+"""关键词匹配模块"""
+
+from functools import lru_cache
+from typing import Any, Iterable, Sequence, Tuple
+
+import ahocorasick
+import pandas as pd
+
+
+def build_keyword_automaton(rules: Iterable[Tuple[Any, Sequence[str]]]) -> ahocorasick.Automaton:
+    """
+    获取 (值, 关键词列表) 规则对应的 Aho-Corasick 自动机
+
+    相同规则的自动机在进程内只构建一次，由所有调用方共享（构建完成后只读）
+
+    Args:
+        rules: 按匹配优先级排列的 (值, 关键词列表)
+
+    Returns:
+        已完成构建的自动机，值为 (优先级序号, 值)
+    """
+    return _compile_keyword_automaton(
+        tuple((value, tuple(keywords)) for value, keywords in rules)
+    )
+
+
+@lru_cache(maxsize=None)
+def _compile_keyword_automaton(rules: tuple) -> ahocorasick.Automaton:
+    """
+    用 (值, 关键词元组) 规则构建 Aho-Corasick 自动机
+
+    每个关键词附带其规则的序号，同一关键词出现在多条规则中时只保留最靠前的一条
+    """
+    automaton = ahocorasick.Automaton()
+    for priority, (value, keywords) in enumerate(rules):
+        for keyword in keywords:
+            if keyword not in automaton:
+                automaton.add_word(keyword, (priority, value))
+    automaton.make_automaton()
+    return automaton
+
+
+def match_keywords(automaton: ahocorasick.Automaton, text: str, default=None):
+    """
+    扫描一次文本，返回命中的优先级最高（序号最小）的规则的值
+
+    Args:
+        automaton: build_keyword_automaton 构建的自动机
+        text: 待匹配文本
+        default: 未命中任何关键词时的返回值
+
+    Returns:
+        规则的值或 default
+    """
+    matches = [match for _, match in automaton.iter(text)]
+    if not matches:
+        return default
+    return min(matches, key=lambda match: match[0])[1]
+
+
+def match_keywords_series(
+    texts: pd.Series, automaton: ahocorasick.Automaton, default=None
+) -> pd.Series:
+    """
+    对整列文本做关键词匹配，重复的文本只扫描一次
+
+    Args:
+        texts: 待匹配文本列
+        automaton: build_keyword_automaton 构建的自动机
+        default: 未命中任何关键词时的值
+
+    Returns:
+        与 texts 索引对齐的匹配结果
+    """
+    mapping = {text: match_keywords(automaton, text, default) for text in texts.unique()}
+    return texts.map(mapping)
@@ -2,18 +2,21 @@
 
 import io
 import argparse
+import heapq
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 # 修复 Windows 控制台编码问题
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
 
-from bill_analysis.parsers import AlipayParser, WechatParser, CCBParser
+from bill_analysis.parsers import BaseParser, AlipayParser, WechatParser, CCBParser
 from bill_analysis.processors import DataCleaner, Deduplicator, TransactionClassifier
 from bill_analysis.analyzers import StatisticsAnalyzer
 from bill_analysis.reports import ReportGenerator
@@ -22,6 +25,16 @@ from bill_analysis.reports import ReportGenerator
 class BillAnalyzer:
     """账单分析器"""
 
+    # 账单文件总大小超过该值（字节）时改用进程池并发解析
+    PROCESS_POOL_THRESHOLD = 64 * 1024 * 1024
+
+    # 各平台的账单文件名模式（按读取与合并顺序排列）
+    BILL_FILES = (
+        ("支付宝", "alipay.csv"),
+        ("微信", "wechat_*.xlsx"),
+        ("建设银行", "ccb.xls"),
+    )
+
     def __init__(
         self,
         input_dir: str,
@@ -29,6 +42,10 @@ class BillAnalyzer:
         year: int = None,
         days: int = None,
         all_data: bool = False,
+        chart_backend: str = "matplotlib",
+        parallel_charts: bool = False,
+        embed_charts: bool = False,
+        compress_csv: bool = False,
     ):
         """
         初始化分析器
@@ -39,12 +56,18 @@ class BillAnalyzer:
             year: 分析年份（None 表示全部）
             days: 分析最近 N 天的数据
             all_data: 是否分析所有数据
+            chart_backend: 图表后端，"matplotlib"（PNG 图片）或 "svg"（矢量图）
+            parallel_charts: 是否用进程池并行绘制图表（仅 matplotlib 后端生效）
+            embed_charts: 是否将图表内嵌到 HTML 报告中，生成单文件报告
+            compress_csv: 是否使用 zstd 压缩导出的 CSV 数据（需要安装 zstd 可选依赖）
         """
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.year = year or datetime.now().year
         self.days = days
         self.all_data = all_data
+        self.embed_charts = embed_charts
+        self.compress_csv = compress_csv
 
         # 创建输出目录
         os.makedirs(output_dir, exist_ok=True)
@@ -57,141 +80,249 @@ class BillAnalyzer:
         self.deduplicator = Deduplicator()
         self.classifier = TransactionClassifier()
         self.analyzer = StatisticsAnalyzer()
-        self.report_generator = ReportGenerator(output_dir)
+        self.report_generator = ReportGenerator(
+            output_dir, chart_backend=chart_backend, parallel_charts=parallel_charts
+        )
 
-    def run(self) -> dict:
+        # 预处理结果缓存：(账单文件签名, 分类后的交易数据)
+        self._prepared_cache = None
+        # 单个账单文件的解析结果缓存：文件路径 -> ((修改时间, 文件大小), 解析结果)
+        self._parse_cache = {}
+
+    def run(self, year: int = None) -> dict:
         """
         运行分析流程
 
+        同一实例多次运行（如依次分析不同年份）时，只要账单文件未变化，
+        读取、清洗、去重和分类的结果会被复用
+
+        Args:
+            year: 本次分析的年份（None 表示使用初始化时的年份）
+
         Returns:
             分析结果
         """
-        # 确定分析时间范围
-        date_range = None
-        analysis_desc = f"年份: {self.year}"
-
-        if self.all_data:
-            analysis_desc = "全部数据"
-        elif self.days is not None:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=self.days)
-            date_range = (start_date, end_date)
-            analysis_desc = f"最近 {self.days} 天 ({start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')})"
+        # 写时复制只在分析流程内启用，不改变调用方进程的 pandas 全局设置
+        with pd.option_context("mode.copy_on_write", True):
+            year = year or self.year
+
+            # 确定分析时间范围
+            date_range = None
+            analysis_desc = f"年份: {year}"
+
+            if self.all_data:
+                analysis_desc = "全部数据"
+            elif self.days is not None:
+                end_date = datetime.now()
+                start_date = end_date - timedelta(days=self.days)
+                date_range = (start_date, end_date)
+                analysis_desc = (
+                    f"最近 {self.days} 天 "
+                    f"({start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')})"
+                )
+
+            print("=" * 60)
+            print(f"开始分析账单数据 ({analysis_desc})")
+            print("=" * 60)
+
+            # 1-4. 读取、清洗、去重、分类
+            classified = self._prepare()
+
+            if classified is None:
+                print("错误: 未找到任何账单数据！")
+                print(f"请确保账单文件放在 {self.input_dir} 目录下")
+                return {}
+
+            # 5. 统计分析
+            print("\n[5/7] 正在进行统计分析...")
+            # 确定分析参数
+            year_param = None if (self.all_data or self.days is not None) else year
+            analysis_result = self.analyzer.analyze(
+                classified, year=year_param, date_range=date_range
+            )
+            print(f"   ✓ 总支出: ¥{analysis_result['summary']['total_amount']:.2f}")
+            print(f"   ✓ 交易笔数: {analysis_result['summary']['total_transactions']}")
+
+            # 6. 生成图表
+            print("\n[6/7] 正在生成可视化图表...")
+            charts = self.report_generator.visualizer.plot_all_charts(analysis_result)
+            print(f"   ✓ 生成 {len(charts)} 个图表")
+
+            # 7. 生成报告
+            print("\n[7/7] 正在生成报告...")
+            reports = self.report_generator.generate_all_reports(
+                analysis_result,
+                classified,
+                embed_charts=self.embed_charts,
+                compress_csv=self.compress_csv,
+            )
+            print(f"   ✓ 报告已生成:")
+
+            for report_type, report_path in reports.items():
+                if report_path:
+                    print(f"     - {report_type}: {report_path}")
+
+            # 打印摘要
+            self._print_summary(analysis_result)
+
+            return {
+                # 返回浅拷贝：调用方修改列时不会影响缓存的交易数据（写时复制下几乎没有开销）
+                "transactions": classified.copy(deep=False),
+                "analysis": analysis_result,
+                "reports": reports,
+                "charts": charts,
+            }
+
+    def _prepare(self):
+        """
+        读取账单并完成清洗、去重和分类
 
-        print("=" * 60)
-        print(f"开始分析账单数据 ({analysis_desc})")
-        print("=" * 60)
+        结果按账单文件的路径、修改时间和大小缓存，文件未变化时直接复用
 
-        # 1. 读取账单数据
-        print("\n[1/7] 正在读取账单数据...")
-        all_transactions = self._load_all_bills()
-
-        if all_transactions.empty:
-            print("错误: 未找到任何账单数据！")
-            print(f"请确保账单文件放在 {self.input_dir} 目录下")
-            return {}
-
-        print(f"   ✓ 共读取 {len(all_transactions)} 条交易记录")
-
-        # 2. 清洗数据
-        print("\n[2/7] 正在清洗数据...")
-        cleaned = self.cleaner.clean(all_transactions)
-        print(f"   ✓ 清洗后剩余 {len(cleaned)} 条有效交易记录")
-
-        # 3. 去重
-        print("\n[3/7] 正在去重...")
-        deduped, duplicates = self.deduplicator.deduplicate(cleaned)
-        duplicate_count = len(duplicates)
-        duplicate_amount = duplicates["金额"].sum() if not duplicates.empty else 0
-        print(f"   ✓ 去除 {duplicate_count} 条重复记录 (¥{abs(duplicate_amount):.2f})")
-        print(f"   ✓ 去重后剩余 {len(deduped)} 条交易记录")
-
-        # 4. 分类
-        print("\n[4/7] 正在进行交易分类...")
-        classified = self.classifier.classify(deduped)
-        print(f"   ✓ 分类完成")
-
-        # 5. 统计分析
-        print("\n[5/7] 正在进行统计分析...")
-        # 确定分析参数
-        year_param = None if (self.all_data or self.days is not None) else self.year
-        analysis_result = self.analyzer.analyze(classified, year=year_param, date_range=date_range)
-        print(f"   ✓ 总支出: ¥{analysis_result['summary']['total_amount']:.2f}")
-        print(f"   ✓ 交易笔数: {analysis_result['summary']['total_transactions']}")
-
-        # 6. 生成图表
-        print("\n[6/7] 正在生成可视化图表...")
-        charts = self.report_generator.visualizer.plot_all_charts(analysis_result)
-        print(f"   ✓ 生成 {len(charts)} 个图表")
-
-        # 7. 生成报告
-        print("\n[7/7] 正在生成报告...")
-        reports = self.report_generator.generate_all_reports(analysis_result, classified)
-        print(f"   ✓ 报告已生成:")
-
-        for report_type, report_path in reports.items():
-            if report_path:
-                print(f"     - {report_type}: {report_path}")
-
-        # 打印摘要
-        self._print_summary(analysis_result)
-
-        return {
-            "transactions": classified,
-            "analysis": analysis_result,
-            "reports": reports,
-            "charts": charts,
+        Returns:
+            分类后的交易数据（未找到任何账单数据时返回 None）
+        """
+        # 筛选、浅拷贝得到的结果与原数据共享内存，只有被修改时才真正复制
+        with pd.option_context("mode.copy_on_write", True):
+            bills = self._find_bill_files()
+            signature = self._bill_signature(bills)
+            if self._prepared_cache is not None and self._prepared_cache[0] == signature:
+                print("\n[1-4/7] 账单文件未变化，复用已处理的交易数据")
+                return self._prepared_cache[1]
+
+            # 1. 读取账单数据
+            print("\n[1/7] 正在读取账单数据...")
+            all_transactions = self._load_all_bills(bills)
+
+            if all_transactions.empty:
+                return None
+
+            print(f"   ✓ 共读取 {len(all_transactions)} 条交易记录")
+
+            # 2. 清洗数据
+            print("\n[2/7] 正在清洗数据...")
+            cleaned = self.cleaner.clean(all_transactions)
+            print(f"   ✓ 清洗后剩余 {len(cleaned)} 条有效交易记录")
+
+            # 3. 去重
+            print("\n[3/7] 正在去重...")
+            deduped, duplicates = self.deduplicator.deduplicate(cleaned)
+            duplicate_count = len(duplicates)
+            duplicate_amount = duplicates["金额"].sum() if not duplicates.empty else 0
+            print(f"   ✓ 去除 {duplicate_count} 条重复记录 (¥{abs(duplicate_amount):.2f})")
+            print(f"   ✓ 去重后剩余 {len(deduped)} 条交易记录")
+
+            # 4. 分类
+            print("\n[4/7] 正在进行交易分类...")
+            classified = self.classifier.classify(deduped)
+            print(f"   ✓ 分类完成")
+
+            self._prepared_cache = (signature, classified)
+            return classified
+
+    def _find_bill_files(self) -> list:
+        """
+        查找输入目录中的账单文件
+
+        每个文件只查询一次状态，得到的 (修改时间, 文件大小) 同时用作预处理结果缓存和
+        单个文件解析结果缓存的键，两层缓存随文件变化一致失效
+
+        Returns:
+            [(平台名, 解析器, 文件路径, (修改时间, 文件大小))]，按 BILL_FILES 的顺序排列
+        """
+        parsers = {
+            "支付宝": self.alipay_parser,
+            "微信": self.wechat_parser,
+            "建设银行": self.ccb_parser,
         }
+        bills = []
+        for platform_name, pattern in self.BILL_FILES:
+            for path in Path(self.input_dir).glob(pattern):
+                stat = path.stat()
+                file_key = (stat.st_mtime, stat.st_size)
+                bills.append((platform_name, parsers[platform_name], str(path), file_key))
+        return bills
+
+    @staticmethod
+    def _bill_signature(bills: list) -> tuple:
+        """账单文件签名：各账单文件的 (路径, (修改时间, 文件大小))"""
+        return tuple((path, file_key) for _, _, path, file_key in bills)
+
+    def _load_all_bills(self, bills: list = None) -> pd.DataFrame:
+        """
+        加载所有账单数据
 
-    def _load_all_bills(self) -> pd.DataFrame:
-        """加载所有账单数据"""
-        all_data = []
+        各账单文件相互独立，并发解析：默认使用线程池（pandas 读取与转换大部分在 C 层完成）；
+        账单文件总大小超过 PROCESS_POOL_THRESHOLD 时解析受 CPU 限制，改用进程池绕开 GIL。
+        结果按提交顺序收集，保证合并顺序与逐个读取时一致。
+        每个文件的解析结果按 (修改时间, 文件大小) 缓存，只重新解析发生变化的文件
 
-        # 尝试加载支付宝账单
-        alipay_file = os.path.join(self.input_dir, "alipay.csv")
-        if os.path.exists(alipay_file):
-            try:
-                print(f"   → 正在读取支付宝账单: {alipay_file}")
-                alipay_data = self.alipay_parser.parse(alipay_file)
-                all_data.append(alipay_data)
-                print(f"     读取 {len(alipay_data)} 条支付宝记录")
-            except Exception as e:
-                print(f"     警告: 读取支付宝账单失败 - {e}")
-        else:
-            print(f"   → 未找到支付宝账单 (alipay.csv)")
+        Args:
+            bills: 要读取的账单文件 [(平台名, 解析器, 文件路径, (修改时间, 文件大小))]
+                （None 表示查找输入目录）
 
-        # 尝试加载微信账单
-        wechat_files = list(Path(self.input_dir).glob("wechat_*.xlsx"))
-        if wechat_files:
-            try:
-                for wechat_file in wechat_files:
-                    print(f"   → 正在读取微信账单: {wechat_file.name}")
-                    wechat_data = self.wechat_parser.parse(str(wechat_file))
-                    all_data.append(wechat_data)
-                    print(f"     读取 {len(wechat_data)} 条微信记录")
-            except Exception as e:
-                print(f"     警告: 读取微信账单失败 - {e}")
-        else:
-            print(f"   → 未找到微信账单 (wechat_*.xlsx)")
+        Returns:
+            合并后按时间排序的交易数据
+        """
+        if bills is None:
+            bills = self._find_bill_files()
+
+        all_data = []
 
-        # 尝试加载建设银行账单
-        ccb_file = os.path.join(self.input_dir, "ccb.xls")
-        if os.path.exists(ccb_file):
+        for platform_name, pattern in self.BILL_FILES:
+            paths = [path for name, _, path, _ in bills if name == platform_name]
+            for path in paths:
+                print(f"   → 正在读取{platform_name}账单: {path}")
+            if not paths:
+                print(f"   → 未找到{platform_name}账单 ({pattern})")
+
+        file_keys = {path: file_key for _, _, path, file_key in bills}
+        pending = [
+            (platform_name, parser, path)
+            for platform_name, parser, path, file_key in bills
+            if self._parse_cache.get(path, (None,))[0] != file_key
+        ]
+
+        total_size = sum(file_keys[path][1] for _, _, path in pending)
+        executor_class = (
+            ProcessPoolExecutor
+            if total_size > self.PROCESS_POOL_THRESHOLD and len(pending) > 1
+            else ThreadPoolExecutor
+        )
+
+        with executor_class(max_workers=min(4, len(pending)) or 1) as executor:
+            futures = {path: executor.submit(parser.parse, path) for _, parser, path in pending}
+
+        # 执行器退出时所有解析已完成，此时再输出结果，避免与解析过程中的输出交错
+        for platform_name, _, path, _ in bills:
+            if path not in futures:
+                data = self._parse_cache[path][1]
+                all_data.append(data)
+                print(f"     {platform_name}账单未变化，复用 {len(data)} 条记录")
+                continue
             try:
-                print(f"   → 正在读取建设银行账单: {ccb_file}")
-                ccb_data = self.ccb_parser.parse(ccb_file)
-                all_data.append(ccb_data)
-                print(f"     读取 {len(ccb_data)} 条建设银行记录")
+                data = futures[path].result()
+                self._parse_cache[path] = (file_keys[path], data)
+                all_data.append(data)
+                print(f"     读取 {len(data)} 条{platform_name}记录")
             except Exception as e:
-                print(f"     警告: 读取建设银行账单失败 - {e}")
-        else:
-            print(f"   → 未找到建设银行账单 (ccb.xls)")
+                self._parse_cache.pop(path, None)
+                print(f"     警告: 读取{platform_name}账单失败 - {e}")
 
         # 合并所有数据
         if all_data:
-            combined = pd.concat(all_data, ignore_index=True)
-            # 按时间排序
-            combined = combined.sort_values("时间").reset_index(drop=True)
+            # 各平台的分类列类别不同，直接合并会退化为 object；先统一类别再合并
+            # （在浅拷贝上替换列，不修改缓存的解析结果）
+            all_data = [data.copy(deep=False) for data in all_data]
+            for col in BaseParser.CATEGORICAL_COLUMNS:
+                categories = union_categoricals(
+                    [data[col] for data in all_data], sort_categories=True
+                ).categories
+                for data in all_data:
+                    data[col] = data[col].cat.set_categories(categories)
+            combined = pd.concat(all_data, ignore_index=True, sort=False)
+            # 按时间排序（排序时直接重建索引，不再单独 reset_index 复制一次）
+            combined = combined.sort_values("时间", ignore_index=True)
             return combined
         else:
             return pd.DataFrame()
@@ -211,8 +342,9 @@ class BillAnalyzer:
         by_category = analysis_result.get("by_category", {})
         if by_category:
             print(f"\n消费分类 (Top 5):")
+            # 只需前 5 个，无需对全部分类排序
             for i, (category, stats) in enumerate(
-                sorted(by_category.items(), key=lambda x: x[1]["amount"], reverse=True)[:5], 1
+                heapq.nlargest(5, by_category.items(), key=lambda x: x[1]["amount"]), 1
             ):
                 print(f"  {i}. {category}: ¥{stats['amount']:.2f} ({stats['count']} 笔)")
 
@@ -255,6 +387,27 @@ def main():
         default="data/output",
         help="输出目录（默认: data/output）",
     )
+    parser.add_argument(
+        "--chart-backend",
+        choices=ReportGenerator.CHART_BACKENDS,
+        default="matplotlib",
+        help="图表后端（默认: matplotlib；svg 直接生成矢量图，速度更快）",
+    )
+    parser.add_argument(
+        "--parallel-charts",
+        action="store_true",
+        help="用多个进程并行绘制 matplotlib 图表（仅在 fork 启动方式下生效，如 Linux）",
+    )
+    parser.add_argument(
+        "--embed-charts",
+        action="store_true",
+        help="将图表内嵌到 HTML 报告中，生成可单独分享的单文件报告",
+    )
+    parser.add_argument(
+        "--compress-csv",
+        action="store_true",
+        help="使用 zstd 压缩导出的 CSV 数据（需要安装 bill-analysis[zstd]）",
+    )
     time_group = parser.add_mutually_exclusive_group()
     time_group.add_argument(
         "--year",
@@ -286,6 +439,10 @@ def main():
         year=args.year,
         days=args.days,
         all_data=args.all,
+        chart_backend=args.chart_backend,
+        parallel_charts=args.parallel_charts,
+        embed_charts=args.embed_charts,
+        compress_csv=args.compress_csv,
     )
 
     # 运行分析
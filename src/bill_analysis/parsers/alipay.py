@@ -1,15 +1,94 @@
 """支付宝账单解析器"""
 
+import codecs
 import os
+from typing import List
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from ..keywords import build_keyword_automaton, match_keywords
 from .base import BaseParser
 
 
 class AlipayParser(BaseParser):
     """支付宝账单解析器"""
 
+    # 标准列名 -> 原始列名匹配正则（按匹配优先级排列）
+    COLUMN_PATTERNS = {
+        "时间": "交易时间|付款时间|时间",
+        "金额": "金额",
+        "对方": "交易对方|对方|商户",
+        "分类": "交易分类|分类",
+        "商品描述": "商品说明|商品名称|商品",
+        "收/支": "收/支|收支",
+        "交易状态": "交易状态|状态",
+    }
+
+    # 账单文件的候选编码（按尝试顺序排列）
+    ENCODINGS = ("gbk", "utf-8", "utf-8-sig")
+
+    # 探测编码时读取的文件开头字节数
+    ENCODING_PROBE_SIZE = 64 * 1024
+
+    # 读取时直接解析为分类类型的低基数标准列
+    CATEGORICAL_SOURCE_COLUMNS = ("收/支", "交易状态")
+
+    # 已知的标准分类，直接原样返回
+    KNOWN_CATEGORIES = frozenset([
+        "餐饮美食", "服饰美容", "生活日用", "交通出行",
+        "通信物流", "休闲娱乐", "医疗健康", "教育培训",
+        "房屋物业", "水电煤", "投资理财", "转账红包",
+        "其他",
+    ])
+
+    # 分类关键词 -> 标准分类（按匹配优先级排列）
+    CATEGORY_MAPPING = {
+        "餐饮": "餐饮美食",
+        "美食": "餐饮美食",
+        "服饰": "服饰美容",
+        "美容": "服饰美容",
+        "日用": "生活日用",
+        "生活": "生活日用",
+        "百货": "生活日用",
+        "交通": "交通出行",
+        "出行": "交通出行",
+        "打车": "交通出行",
+        "地铁": "交通出行",
+        "公交": "交通出行",
+        "通信": "通信物流",
+        "物流": "通信物流",
+        "快递": "通信物流",
+        "娱乐": "休闲娱乐",
+        "休闲": "休闲娱乐",
+        "医疗": "医疗健康",
+        "健康": "医疗健康",
+        "药店": "医疗健康",
+        "医院": "医疗健康",
+        "教育": "教育培训",
+        "培训": "教育培训",
+        "学习": "教育培训",
+        "物业": "房屋物业",
+        "房租": "房屋物业",
+        "住房": "房屋物业",
+        "水电": "水电煤",
+        "煤气": "水电煤",
+        "电费": "水电煤",
+        "水费": "水电煤",
+        "投资": "投资理财",
+        "理财": "投资理财",
+        "基金": "投资理财",
+        "股票": "投资理财",
+        "转账": "转账红包",
+        "红包": "转账红包",
+    }
+
     def __init__(self):
         super().__init__("支付宝")
+        # 构建分类关键词自动机以提高性能（映射顺序即匹配优先级）
+        self._category_automaton = build_keyword_automaton(
+            (value, [keyword]) for keyword, value in self.CATEGORY_MAPPING.items()
+        )
 
     def parse(self, file_path: str) -> pd.DataFrame:
         """
@@ -32,99 +111,125 @@ class AlipayParser(BaseParser):
             raise FileNotFoundError(f"支付宝账单文件不存在: {file_path}")
 
         # 读取 CSV 文件（支付宝 CSV 可能是 GBK 编码）
-        try:
-            df = pd.read_csv(file_path, encoding="gbk")
-        except UnicodeDecodeError:
+        # 先用文件开头探测编码，只有解码中途出错时才依次尝试其余编码
+        encodings = self._candidate_encodings(file_path)
+        for encoding in encodings[:-1]:
             try:
-                df = pd.read_csv(file_path, encoding="utf-8")
-            except:
-                df = pd.read_csv(file_path, encoding="utf-8-sig")
+                df = self._read_csv(file_path, encoding=encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            df = self._read_csv(file_path, encoding=encodings[-1])
 
         # 映射列名到标准格式
         df = self._map_columns(df)
 
-        # 根据交易状态过滤：只保留"交易成功"的交易
-        # 这会排除退款成功、交易关闭等状态
-        if "交易状态" in df.columns:
-            before_count = len(df)
-            df = df[df["交易状态"] == "交易成功"].copy()
-            after_count = len(df)
-            if before_count > after_count:
-                print(f"  支付宝账单：根据交易状态过滤，保留 {after_count}/{before_count} 条记录")
-
         # 标准化数据
-        df["时间"] = pd.to_datetime(df["时间"], errors="coerce")
+        df["时间"] = self._standardize_time_series(df["时间"])
         df["平台"] = self.platform_name
 
         # 处理金额：移除货币符号并转换
         df["金额"] = pd.to_numeric(df["金额"], errors="coerce").fillna(0)
 
-        # 支付宝中支出已经是负数或需要转换
-        df.loc[df["收/支"] == "支出", "金额"] = df.loc[df["收/支"] == "支出", "金额"].abs() * -1
-        df.loc[df["收/支"] == "收入", "金额"] = df.loc[df["收/支"] == "收入", "金额"].abs()
+        # 支付宝中支出已经是负数或需要转换，由 _normalize_dataframe 统一修正符号
 
         # 标准化分类
-        df["分类"] = df["分类"].apply(self._standardize_category)
+        df["分类"] = self._standardize_categories(df["分类"])
 
         # 添加原始描述
-        df["原始描述"] = df.get("商品说明", "") + " " + df.get("交易对方", "")
+        df["原始描述"] = self._join_text(df, ["商品描述", "对方"])
 
         # 标准化为统一格式
         normalized = self._normalize_dataframe(df)
 
         return normalized
 
-    def _map_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _candidate_encodings(self, file_path: str) -> List[str]:
         """
-        映射支付宝账单列名到标准列名
+        探测账单文件编码，返回按尝试顺序排列的候选编码
+
+        读取文件开头一段字节，按 ENCODINGS 的顺序取第一个能严格解码的编码放在最前，
+        其余编码保持原顺序作为后备
+
+        Args:
+            file_path: 账单文件路径
+
+        Returns:
+            候选编码列表
         """
-        # 创建列名映射
-        column_mapping = {}
+        with open(file_path, "rb") as f:
+            head = f.read(self.ENCODING_PROBE_SIZE)
 
-        # 时间列
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["交易时间", "付款时间", "时间"]):
-                column_mapping[col] = "时间"
-                break
+        for encoding in self.ENCODINGS:
+            try:
+                # 增量解码：末尾被截断的多字节字符不视为错误
+                codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            except UnicodeDecodeError:
+                continue
+            return [encoding] + [other for other in self.ENCODINGS if other != encoding]
 
-        # 金额列
-        for col in df.columns:
-            if "金额" in str(col):
-                column_mapping[col] = "金额"
-                break
+        return list(self.ENCODINGS)
 
-        # 交易对方列 -> 映射为"对方"
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["交易对方", "对方", "商户"]):
-                column_mapping[col] = "对方"
-                break
+    def _read_csv(self, file_path: str, encoding: str) -> pd.DataFrame:
+        """
+        读取支付宝账单 CSV 文件中需要的列
 
-        # 交易分类列 -> 映射为"类型"和"分类"
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["交易分类", "分类"]):
-                column_mapping[col] = "分类"
-                break
+        先只读表头确定列名映射，再用 PyArrow（多线程列式解析）只解析映射到的列，
+        收/支、交易状态等低基数列直接读为字典编码（转换后为分类类型），
+        并在转换为 DataFrame 之前按交易状态过滤
 
-        # 商品说明列 -> 映射为"商品描述"
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["商品说明", "商品名称", "商品"]):
-                column_mapping[col] = "商品描述"
-                break
+        Args:
+            file_path: 账单文件路径
+            encoding: 文件编码
 
-        # 收支列
-        for col in df.columns:
-            if "收/支" in str(col) or "收支" in str(col):
-                column_mapping[col] = "收/支"
-                break
+        Returns:
+            保留原始列名的 DataFrame
+        """
+        header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+        column_mapping = self._resolve_column_mapping(header)
+
+        include_columns = list(column_mapping)
+        # 未找到时间列时以第一列代替（见 _map_columns）
+        if "时间" not in column_mapping.values() and len(header) > 0 and header[0] not in include_columns:
+            include_columns.insert(0, header[0])
+
+        column_types = {
+            col: pa.dictionary(pa.int32(), pa.string())
+            for col, target in column_mapping.items()
+            if target in self.CATEGORICAL_SOURCE_COLUMNS
+        }
 
-        # 交易状态列（用于过滤）
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["交易状态", "状态"]):
-                column_mapping[col] = "交易状态"
-                break
+        table = pacsv.read_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(encoding=encoding),
+            # 与 pandas 一致：空字符串等缺失值标记读为缺失值
+            convert_options=pacsv.ConvertOptions(
+                include_columns=include_columns,
+                column_types=column_types,
+                strings_can_be_null=True,
+            ),
+        )
+
+        # 根据交易状态过滤：只保留"交易成功"的交易
+        # 这会排除退款成功、交易关闭等状态
+        status_columns = [col for col, target in column_mapping.items() if target == "交易状态"]
+        if status_columns:
+            before_count = table.num_rows
+            status = table[status_columns[0]].cast(pa.string())
+            table = table.filter(pc.equal(status, "交易成功"))
+            after_count = table.num_rows
+            if before_count > after_count:
+                print(f"  支付宝账单：根据交易状态过滤，保留 {after_count}/{before_count} 条记录")
+
+        return table.to_pandas()
 
+    def _map_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        映射支付宝账单列名到标准列名
+        """
         # 重命名列
-        df = df.rename(columns=column_mapping)
+        df = df.rename(columns=self._resolve_column_mapping(df.columns))
 
         # 确保必要的列存在
         if "时间" not in df.columns:
@@ -138,14 +243,27 @@ class AlipayParser(BaseParser):
         if "分类" not in df.columns:
             df["分类"] = "未分类"
         if "收/支" not in df.columns:
-            df["收/支"] = df["金额"].apply(lambda x: "支出" if x < 0 else "收入")
+            df["收/支"] = self._infer_direction(df["金额"])
         if "类型" not in df.columns:
-            df["类型"] = df.get("分类", "未分类")
+            # 支付宝账单没有单独的类型列，沿用原始分类（上面已确保分类列存在）
+            df["类型"] = df["分类"]
         if "交易状态" not in df.columns:
             df["交易状态"] = "交易成功"  # 默认状态，不过滤
 
         return df[["时间", "金额", "对方", "类型", "商品描述", "分类", "收/支", "交易状态"]]
 
+    def _standardize_categories(self, categories: pd.Series) -> pd.Series:
+        """
+        批量标准化支付宝消费分类
+
+        分类取值的种类很少，只对去重后的取值逐个标准化，再整列映射回去
+        """
+        mapping = {
+            category: self._standardize_category(category)
+            for category in categories.dropna().unique()
+        }
+        return categories.map(mapping).fillna("未分类")
+
     def _standardize_category(self, category: str) -> str:
         """
         标准化支付宝消费分类
@@ -156,59 +274,8 @@ class AlipayParser(BaseParser):
         category = str(category).strip()
 
         # 直接返回已知的正确分类
-        known_categories = [
-            "餐饮美食", "服饰美容", "生活日用", "交通出行",
-            "通信物流", "休闲娱乐", "医疗健康", "教育培训",
-            "房屋物业", "水电煤", "投资理财", "转账红包",
-            "其他"
-        ]
-
-        if category in known_categories:
+        if category in self.KNOWN_CATEGORIES:
             return category
 
-        # 分类映射
-        category_mapping = {
-            "餐饮": "餐饮美食",
-            "美食": "餐饮美食",
-            "服饰": "服饰美容",
-            "美容": "服饰美容",
-            "日用": "生活日用",
-            "生活": "生活日用",
-            "百货": "生活日用",
-            "交通": "交通出行",
-            "出行": "交通出行",
-            "打车": "交通出行",
-            "地铁": "交通出行",
-            "公交": "交通出行",
-            "通信": "通信物流",
-            "物流": "通信物流",
-            "快递": "通信物流",
-            "娱乐": "休闲娱乐",
-            "休闲": "休闲娱乐",
-            "医疗": "医疗健康",
-            "健康": "医疗健康",
-            "药店": "医疗健康",
-            "医院": "医疗健康",
-            "教育": "教育培训",
-            "培训": "教育培训",
-            "学习": "教育培训",
-            "物业": "房屋物业",
-            "房租": "房屋物业",
-            "住房": "房屋物业",
-            "水电": "水电煤",
-            "煤气": "水电煤",
-            "电费": "水电煤",
-            "水费": "水电煤",
-            "投资": "投资理财",
-            "理财": "投资理财",
-            "基金": "投资理财",
-            "股票": "投资理财",
-            "转账": "转账红包",
-            "红包": "转账红包",
-        }
-
-        for key, value in category_mapping.items():
-            if key in category:
-                return value
-
-        return category
+        # 单次扫描找出全部命中的关键词，取优先级最高（映射中最靠前）的一个
+        return match_keywords(self._category_automaton, category, default=category)
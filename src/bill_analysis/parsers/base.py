@@ -1,14 +1,58 @@
 """基础账单解析器"""
 
+import re
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Dict
+import numpy as np
 import pandas as pd
-from datetime import datetime
 
 
 class BaseParser(ABC):
     """账单解析器基类"""
 
+    # 标准字段（按输出顺序排列）
+    STANDARD_COLUMNS = ["时间", "平台", "类型", "对方", "金额", "收/支", "商品描述", "分类", "原始描述"]
+
+    # 解析结果缺少某个标准字段时使用的默认值
+    COLUMN_DEFAULTS = {
+        "类型": "",
+        "对方": "",
+        "收/支": "支出",
+        "商品描述": "",
+        "分类": "未分类",
+        "原始描述": "",
+    }
+
+    # 低基数的字符串列，标准化后转为分类类型（按整数编码分组，节省内存）
+    CATEGORICAL_COLUMNS = ["平台", "类型", "分类", "收/支"]
+
+    # 标准列名 -> 原始列名匹配正则（按匹配优先级排列），由各解析器定义
+    COLUMN_PATTERNS: Dict[str, str] = {}
+
+    # Excel 文件头签名 -> 未安装 calamine 时使用的读取引擎
+    EXCEL_ENGINES = {
+        b"PK\x03\x04": "openpyxl",  # .xlsx（ZIP 容器）
+        b"\xd0\xcf\x11\xe0": "xlrd",  # .xls（OLE2 复合文档）
+    }
+
+    # 高基数的文本列，转为 Arrow 字符串类型（连续 UTF-8 缓冲区，字符串操作在 C++ 中执行）
+    TEXT_COLUMNS = ["对方", "商品描述", "原始描述"]
+
+    # 常见时间格式（按尝试顺序排列）
+    TIME_FORMATS = [
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d %H:%M",
+        "%Y-%m-%d",
+        "%Y/%m/%d %H:%M:%S",
+        "%Y/%m/%d %H:%M",
+        "%Y/%m/%d",
+        "%Y年%m月%d日 %H:%M:%S",
+        "%Y年%m月%d日",
+        "%d/%m/%Y %H:%M:%S",
+        "%d/%m/%Y %H:%M",
+        "%d/%m/%Y",
+    ]
+
     def __init__(self, platform_name: str):
         """
         初始化解析器
@@ -17,6 +61,10 @@ class BaseParser(ABC):
             platform_name: 平台名称（建设银行、支付宝、微信）
         """
         self.platform_name = platform_name
+        # 编译列名匹配正则以提高性能
+        self._column_patterns = [
+            (target, re.compile(pattern)) for target, pattern in self.COLUMN_PATTERNS.items()
+        ]
 
     @abstractmethod
     def parse(self, file_path: str) -> pd.DataFrame:
@@ -31,88 +79,160 @@ class BaseParser(ABC):
         """
         pass
 
+    def _read_excel(self, file_path: str) -> pd.DataFrame:
+        """
+        读取 Excel 账单文件
+
+        根据文件头签名识别实际格式（不依赖扩展名），优先使用 calamine 引擎（Rust 实现，
+        同时支持 .xls 和 .xlsx），未安装时按格式选择 openpyxl 或 xlrd
+
+        Args:
+            file_path: 账单文件路径
+
+        Returns:
+            读取的原始数据
+        """
+        with open(file_path, "rb") as f:
+            signature = f.read(4)
+
+        fallback_engine = self.EXCEL_ENGINES.get(signature)
+        if fallback_engine is None:
+            raise ValueError(f"{self.platform_name}账单不是有效的 Excel 文件: {file_path}")
+
+        try:
+            return pd.read_excel(file_path, engine="calamine")
+        except ImportError:
+            return pd.read_excel(file_path, engine=fallback_engine)
+
+    def _resolve_column_mapping(self, columns) -> Dict[str, str]:
+        """
+        根据表头确定原始列名到标准列名的映射
+
+        单次遍历列名：每列归入 COLUMN_PATTERNS 中第一个匹配且尚未占用的标准列
+
+        Args:
+            columns: 原始列名
+
+        Returns:
+            原始列名 -> 标准列名
+        """
+        column_mapping = {}
+        for col in columns:
+            name = str(col)
+            for target, pattern in self._column_patterns:
+                if target not in column_mapping.values() and pattern.search(name):
+                    column_mapping[col] = target
+                    break
+
+        return column_mapping
+
+    def _infer_direction(self, amounts: pd.Series, zero_label: str = "收入") -> np.ndarray:
+        """
+        根据金额正负推断收/支
+
+        Args:
+            amounts: 金额列
+            zero_label: 金额为零（或缺失）时的收/支
+
+        Returns:
+            负数为"支出"、正数为"收入"、其余为 zero_label 的数组
+        """
+        values = amounts.to_numpy()
+        return np.select([values < 0, values > 0], ["支出", "收入"], default=zero_label)
+
+    def _join_text(self, df: pd.DataFrame, columns) -> pd.Series:
+        """
+        将多列文本以空格连接为一列
+
+        Args:
+            df: 交易数据
+            columns: 要连接的列名，不存在的列按空字符串处理
+
+        Returns:
+            连接后的文本列（缺失值按空字符串处理）
+        """
+        parts = [
+            df[col].fillna("").astype(str) if col in df.columns else pd.Series("", index=df.index)
+            for col in columns
+        ]
+        return parts[0].str.cat(parts[1:], sep=" ")
+
+    @staticmethod
+    def _clean_text(series: pd.Series) -> pd.Series:
+        """缺失值替换为空字符串，统一转为去除首尾空白的字符串"""
+        return series.fillna("").astype(str).str.strip()
+
     def _normalize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         将原始数据标准化为统一格式
 
         标准字段：
-        - 时间: datetime
-        - 平台: string
-        - 类型: string
-        - 对方: string
-        - 金额: float (负数表示支出)
-        - 收/支: string
-        - 商品描述: string
-        - 分类: string
-        - 原始描述: string
-        """
-        normalized = pd.DataFrame(
-            {
-                "时间": pd.to_datetime(df["时间"]),
-                "平台": self.platform_name,
-                "类型": df.get("类型", ""),
-                "对方": df.get("对方", ""),
-                "金额": pd.to_numeric(df["金额"], errors="coerce").fillna(0),
-                "收/支": df.get("收/支", "支出"),
-                "商品描述": df.get("商品描述", ""),
-                "分类": df.get("分类", "未分类"),
-                "原始描述": df.get("原始描述", ""),
-            }
+        - 时间: datetime64
+        - 平台: category
+        - 类型: category
+        - 对方: string[pyarrow]
+        - 金额: float64 (负数表示支出)
+        - 收/支: category
+        - 商品描述: string[pyarrow]
+        - 分类: category
+        - 原始描述: string[pyarrow]
+
+        category 列（CATEGORICAL_COLUMNS）不能直接写入类别之外的值（如 fillna("")），
+        需先 astype(object) 或 cat.add_categories；string[pyarrow] 列（TEXT_COLUMNS）
+        的缺失值为 pd.NA，.str 方法返回可空类型（如 boolean、Int64）
+        """
+        # 直接在解析器的工作数据上补齐、转换各列，最后只选出标准字段，不再另建一份完整副本
+        for col, default in self.COLUMN_DEFAULTS.items():
+            if col not in df.columns:
+                df[col] = default
+        df["平台"] = self.platform_name
+
+        # 各解析器通常已完成类型转换，只有类型不符时才重新转换，避免重复扫描整列
+        if not pd.api.types.is_datetime64_any_dtype(df["时间"]):
+            df["时间"] = pd.to_datetime(df["时间"])
+
+        if not pd.api.types.is_numeric_dtype(df["金额"]) or df["金额"].hasnans:
+            df["金额"] = pd.to_numeric(df["金额"], errors="coerce").fillna(0)
+
+        # 确保支出金额为负数、收入金额为正数（其他收支类型保持原值）
+        amount = df["金额"].to_numpy()
+        direction = df["收/支"].to_numpy()
+        df["金额"] = np.where(
+            direction == "支出",
+            -np.abs(amount),
+            np.where(direction == "收入", np.abs(amount), amount),
         )
 
-        # 确保支出金额为负数
-        normalized.loc[normalized["收/支"] == "支出", "金额"] = normalized.loc[
-            normalized["收/支"] == "支出", "金额"
-        ].abs() * -1
-        # 确保收入金额为正数
-        normalized.loc[normalized["收/支"] == "收入", "金额"] = normalized.loc[
-            normalized["收/支"] == "收入", "金额"
-        ].abs()
+        for col in self.CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype("category")
+        for col in self.TEXT_COLUMNS:
+            df[col] = df[col].astype("string[pyarrow]")
 
-        return normalized
+        return df[self.STANDARD_COLUMNS]
 
-    def _standardize_time(self, time_str: str, format_str: Optional[str] = None) -> datetime:
+    def _standardize_time_series(self, times: pd.Series) -> pd.Series:
         """
-        标准化时间格式
+        批量标准化时间列
+
+        先用 pandas 逐元素推断格式整列解析，再对无法解析的值依次尝试常见时间格式，
+        仍无法解析的值保留为 NaT
 
         Args:
-            time_str: 时间字符串
-            format_str: 时间格式字符串
+            times: 时间列
 
         Returns:
-            标准化的 datetime 对象
-        """
-        if pd.isna(time_str):
-            return datetime.now()
-
-        time_str = str(time_str).strip()
-
-        # 常见时间格式
-        formats = [
-            format_str,
-            "%Y-%m-%d %H:%M:%S",
-            "%Y-%m-%d %H:%M",
-            "%Y-%m-%d",
-            "%Y/%m/%d %H:%M:%S",
-            "%Y/%m/%d %H:%M",
-            "%Y/%m/%d",
-            "%Y年%m月%d日 %H:%M:%S",
-            "%Y年%m月%d日",
-            "%d/%m/%Y %H:%M:%S",
-            "%d/%m/%Y %H:%M",
-            "%d/%m/%Y",
-        ]
+            datetime 类型的时间列
+        """
+        if pd.api.types.is_datetime64_any_dtype(times):
+            return times
 
-        for fmt in formats:
-            if fmt is None:
-                continue
-            try:
-                return datetime.strptime(time_str, fmt)
-            except (ValueError, TypeError):
-                continue
+        result = pd.to_datetime(times, format="mixed", errors="coerce")
 
-        # 如果所有格式都失败，尝试用 pandas 解析
-        try:
-            return pd.to_datetime(time_str)
-        except:
-            return datetime.now()
+        for fmt in self.TIME_FORMATS:
+            missing = result.isna() & times.notna()
+            if not missing.any():
+                break
+            retry = pd.to_datetime(times[missing].astype(str).str.strip(), format=fmt, errors="coerce")
+            result = result.fillna(retry)
+
+        return result
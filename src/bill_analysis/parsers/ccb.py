@@ -1,15 +1,112 @@
 """建设银行账单解析器"""
 
 import os
+import numpy as np
 import pandas as pd
+from ..keywords import build_keyword_automaton, match_keywords_series
 from .base import BaseParser
 
 
 class CCBParser(BaseParser):
     """建设银行账单解析器"""
 
+    # 标准列名 -> 原始列名匹配正则（按匹配优先级排列）
+    COLUMN_PATTERNS = {
+        # 时间列 - 优先匹配记账日期
+        "时间": "记账日期|交易日期|日期|时间",
+        # 金额列（排除账户余额）
+        "金额": "^(?!.*余额).*金额",
+        # 交易对方列
+        "对方": "对方|收款人|付款人|户名|对方账号",
+        # 摘要列 -> 映射为"类型"
+        "类型": "摘要|交易类型",
+        # 交易地点/附言 -> 映射为"商品描述"
+        "商品描述": "地点|附言|备注|说明",
+    }
+
+    # 摘要中的存取款关键词
+    DEPOSIT_KEYWORDS = ["存入", "存款", "转入"]
+    WITHDRAW_KEYWORDS = ["支取", "取现", "提现"]
+
+    # 经由支付宝/微信的消费，需从描述中提取商户类型
+    THIRD_PARTY_KEYWORDS = ["支付宝", "微信"]
+
+    # 分类规则：(分类, 关键词)，按匹配优先级排列
+    CATEGORY_RULES = [
+        # 交通出行（优先检查）
+        ("交通出行", ["12306", "铁路", "火车票", "高铁", "机票", "航空", "飞机", "携程",
+                      "去哪儿", "同程", "飞猪", "途牛", "中铁", "铁旅", "客运"]),
+        # 餐饮类
+        ("餐饮美食", ["餐饮", "食堂", "麦当劳", "肯德基", "星巴克", "咖啡", "美食", "食品",
+                      "喜茶", "奈雪", "瑞幸", "必胜客", "华莱士", "海底捞", "霸王茶姬",
+                      "茶百道", "蜜雪冰城", "沪上阿姨"]),
+        # 超市购物
+        ("购物消费", ["超市", "便利店", "百货", "购物", "屈臣氏", "沃尔玛", "家乐福",
+                      "永辉", "盒马", "苏果", "大润发", "物美", "ole", "山姆", "美宜佳",
+                      "罗森", "7-11", "全家"]),
+        # 电商平台
+        ("购物消费", ["京东", "淘宝", "天猫", "拼多多", "抖音", "小红书"]),
+        # 生活日用
+        ("生活日用", ["日用", "家居", "生活", "零食", "有鸣"]),
+        # 交通类
+        ("交通出行", ["交通", "出行", "停车", "加油", "地铁", "公交", "打车", "骑车",
+                      "哈啰", "青桔", "美团骑行", "摩拜"]),
+        # 话费充值
+        ("通讯话费", ["话费", "充值", "通讯", "宽带", "移动", "联通", "电信"]),
+        # 娱乐
+        ("休闲娱乐", ["电影", "ktv", "游戏", "视频", "音乐", "娱乐", "腾讯视频",
+                      "爱奇艺", "优酷", "bilibili", "抖音", "快手"]),
+        # 教育类
+        ("教育培训", ["教育", "培训", "学习", "课程", "书店"]),
+        # 医疗类
+        ("医疗健康", ["医院", "药店", "诊所", "医疗", "健康", "药房", "体检"]),
+    ]
+
+    # 消费类型规则：(分类, 关键词)，按匹配优先级排列
+    CONSUMPTION_RULES = [
+        # 交通出行（优先检查）
+        ("交通出行", ["12306", "铁路", "火车票", "高铁", "机票", "航空", "飞机", "携程",
+                      "去哪儿", "同程", "飞猪", "途牛", "马蜂窝", "中铁", "铁旅", "客运"]),
+        # 地铁公交打车
+        ("交通出行", ["地铁", "公交", "打车", "滴滴", "出租车", "骑车", "单车", "停车",
+                      "加油", "充电", "哈啰", "青桔", "美团骑行", "摩拜"]),
+        # 餐饮
+        ("餐饮美食", ["餐", "饮", "咖啡", "茶", "麦当劳", "肯德基", "星巴克", "汉堡",
+                      "披萨", "美食", "食品", "食堂", "喜茶", "奈雪", "瑞幸", "必胜客",
+                      "华莱士", "海底捞", "霸王茶姬", "茶百道", "蜜雪冰城", "沪上阿姨"]),
+        # 超市购物
+        ("购物消费", ["超市", "便利店", "屈臣氏", "沃尔玛", "家乐福", "永辉", "盒马",
+                      "百货", "购物", "苏果", "大润发", "物美", "ole", "山姆", "美宜佳",
+                      "罗森", "7-11", "全家"]),
+        # 电商平台
+        ("购物消费", ["京东", "淘宝", "天猫", "拼多多", "抖音", "小红书", "苏宁", "国美"]),
+        # 生活日用
+        ("生活日用", ["日用", "家居", "生活", "零食", "有鸣"]),
+        # 服饰美容
+        ("服饰美容", ["服装", "服饰", "鞋", "帽", "美容", "美发", "美甲", "化妆", "bag",
+                      "shop", "store", "护肤品"]),
+        # 娱乐
+        ("休闲娱乐", ["电影", "ktv", "游戏", "视频", "音乐", "娱乐", "腾讯视频",
+                      "爱奇艺", "优酷", "bilibili", "抖音", "快手"]),
+        # 通讯
+        ("通讯话费", ["话费", "充值", "通讯", "宽带", "流量", "移动", "联通", "电信"]),
+        # 教育
+        ("教育培训", ["教育", "培训", "学习", "课程", "书店"]),
+        # 医疗
+        ("医疗健康", ["医院", "药店", "诊所", "医疗", "健康", "药房", "体检"]),
+    ]
+
     def __init__(self):
         super().__init__("建设银行")
+        # 摘要规则：消费（None 表示按消费类型判断）优先，其次存入、支取
+        self._summary_automaton = build_keyword_automaton(
+            [(None, ["消费"]), ("转账红包", self.DEPOSIT_KEYWORDS), ("其他", self.WITHDRAW_KEYWORDS)]
+        )
+        # 描述类规则构建为关键词自动机：转账优先，支付宝/微信（None 表示按消费类型判断）最后
+        self._category_automaton = build_keyword_automaton(
+            [("转账红包", ["转账"]), *self.CATEGORY_RULES, (None, self.THIRD_PARTY_KEYWORDS)]
+        )
+        self._consumption_automaton = build_keyword_automaton(self.CONSUMPTION_RULES)
 
     def parse(self, file_path: str) -> pd.DataFrame:
         """
@@ -29,13 +126,8 @@ class CCBParser(BaseParser):
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"建设银行账单文件不存在: {file_path}")
 
-        # 读取 Excel 文件 - 根据文件扩展名选择引擎
-        engine = "xlrd" if file_path.endswith(".xls") else "openpyxl"
-        try:
-            df = pd.read_excel(file_path, engine=engine)
-        except Exception as e:
-            # 如果指定引擎失败，尝试自动选择
-            df = pd.read_excel(file_path)
+        # 读取 Excel 文件（.xls 或 .xlsx）
+        df = self._read_excel(file_path)
 
         # 查找关键列（建行列名可能有所不同）
         df = self._map_columns(df)
@@ -58,23 +150,20 @@ class CCBParser(BaseParser):
                 df["时间"] = df["时间"].astype(str)
                 df["时间"] = pd.to_datetime(df["时间"], format="%Y%m%d", errors="coerce")
             else:
-                df["时间"] = pd.to_datetime(df["时间"], errors="coerce")
+                df["时间"] = self._standardize_time_series(df["时间"])
 
         # 处理金额：先转换为数值（移除逗号）
         df["金额"] = pd.to_numeric(df["金额"], errors="coerce").fillna(0)
 
         # 建设银行中：负数=支出，正数=收入
         # 根据金额正负判断收/支（在转换为统一格式前）
-        df["收/支"] = df["金额"].apply(lambda x: "支出" if x < 0 else "收入" if x > 0 else "其他")
+        df["收/支"] = self._infer_direction(df["金额"], zero_label="其他")
 
-        # 推断分类
-        df["分类"] = df.apply(
-            lambda row: self._infer_category(row["类型"], row.get("商品描述", ""), row.get("对方", "")),
-            axis=1
-        )
+        # 推断分类（整列向量化匹配）
+        df["分类"] = self._infer_categories(df)
 
         # 添加原始描述
-        df["原始描述"] = df.get("类型", "") + " " + df.get("商品描述", "") + " " + df.get("对方", "")
+        df["原始描述"] = self._join_text(df, ["类型", "商品描述", "对方"])
 
         # 标准化为统一格式
         normalized = self._normalize_dataframe(df)
@@ -85,19 +174,13 @@ class CCBParser(BaseParser):
         """
         映射建设银行账单列名到标准列名
         """
-        # 创建列名映射
-        column_mapping = {}
-
-        # 时间列 - 优先匹配记账日期
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["记账日期", "交易日期", "日期", "时间"]):
-                column_mapping[col] = "时间"
-                break
+        # 按列名关键词匹配
+        column_mapping = self._resolve_column_mapping(df.columns)
 
         # 如果没找到，尝试查找包含日期格式的列
-        if "时间" not in column_mapping:
+        if "时间" not in column_mapping.values():
             for col in df.columns:
-                if df[col].dtype in ["int64", "object"]:
+                if col not in column_mapping and df[col].dtype in ["int64", "object"]:
                     # 检查是否是YYYYMMDD格式的数据
                     sample_val = df[col].dropna().iloc[0] if not df[col].dropna().empty else None
                     if sample_val and not pd.isna(sample_val):
@@ -110,30 +193,6 @@ class CCBParser(BaseParser):
                             column_mapping[col] = "时间"
                             break
 
-        # 金额列
-        for col in df.columns:
-            if "金额" in str(col) and "余额" not in str(col):
-                column_mapping[col] = "金额"
-                break
-
-        # 交易对方列
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["对方", "收款人", "付款人", "户名", "对方账号"]):
-                column_mapping[col] = "对方"
-                break
-
-        # 摘要列 -> 映射为"类型"
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["摘要", "交易类型"]):
-                column_mapping[col] = "类型"
-                break
-
-        # 交易地点/附言 -> 映射为"商品描述"
-        for col in df.columns:
-            if any(keyword in str(col) for keyword in ["地点", "附言", "备注", "说明"]):
-                column_mapping[col] = "商品描述"
-                break
-
         # 重命名列
         df = df.rename(columns=column_mapping)
 
@@ -154,178 +213,52 @@ class CCBParser(BaseParser):
 
         return df[["时间", "金额", "对方", "类型", "商品描述", "分类"]]
 
-    def _infer_category(self, summary: str, description: str, counterparty: str) -> str:
+    def _infer_categories(self, df: pd.DataFrame) -> pd.Series:
         """
-        根据摘要、描述和对方推断分类
+        根据摘要、描述和对方批量推断分类
+
+        摘要规则与描述类规则均由自动机对去重后的文本各扫描一次，
+        最后按优先级用 np.select 取第一条命中的规则
 
         Args:
-            summary: 交易摘要（如：消费、存入等）
-            description: 交易地点/附言
-            counterparty: 对方账号与户名
-        """
-        if pd.isna(summary):
-            summary = ""
-        if pd.isna(description):
-            description = ""
-        if pd.isna(counterparty):
-            counterparty = ""
+            df: 包含"类型"（摘要）、"商品描述"（交易地点/附言）、"对方"列的数据
 
-        summary = str(summary).strip()
-        description = str(description).strip()
-        counterparty = str(counterparty).strip()
+        Returns:
+            与 df 索引对齐的分类 Series
+        """
+        summary = self._clean_text(df["类型"])
+        description = self._clean_text(df["商品描述"])
+        counterparty = self._clean_text(df["对方"])
 
         # 组合所有信息进行判断
-        text = f"{summary} {description} {counterparty}".lower()
-
-        # 根据摘要直接判断
-        if "消费" in summary:
-            # 进一步判断消费类型
-            return self._infer_consumption_type(description, counterparty)
-
-        # 存取款类
-        if any(keyword in summary for keyword in ["存入", "存款", "转入"]):
-            return "转账红包"  # 存入通常是转账
-
-        if any(keyword in summary for keyword in ["支取", "取现", "提现"]):
-            return "其他"  # 取现不计入消费
-
-        # 转账类
-        if "转账" in text:
-            return "转账红包"
-
-        # 交通出行（优先检查）
-        if any(keyword in text for keyword in ["12306", "铁路", "火车票", "高铁",
-                                                   "机票", "航空", "飞机", "携程",
-                                                   "去哪儿", "同程", "飞猪", "途牛",
-                                                   "中铁", "铁旅", "客运"]):
-            return "交通出行"
-
-        # 餐饮类
-        if any(keyword in text for keyword in ["餐饮", "食堂", "麦当劳", "肯德基",
-                                                   "星巴克", "咖啡", "美食", "食品",
-                                                   "喜茶", "奈雪", "瑞幸", "必胜客",
-                                                   "华莱士", "海底捞", "霸王茶姬",
-                                                   "茶百道", "蜜雪冰城", "沪上阿姨"]):
-            return "餐饮美食"
-
-        # 超市购物
-        if any(keyword in text for keyword in ["超市", "便利店", "百货", "购物",
-                                                   "屈臣氏", "沃尔玛", "家乐福",
-                                                   "永辉", "盒马", "苏果", "大润发",
-                                                   "物美", "ole", "山姆", "美宜佳",
-                                                   "罗森", "7-11", "全家"]):
-            return "购物消费"
-
-        # 电商平台
-        if any(keyword in text for keyword in ["京东", "淘宝", "天猫", "拼多多",
-                                                   "抖音", "小红书"]):
-            return "购物消费"
-
-        # 生活日用
-        if any(keyword in text for keyword in ["日用", "家居", "生活", "零食",
-                                                   "有鸣"]):
-            return "生活日用"
-
-        # 交通类
-        if any(keyword in text for keyword in ["交通", "出行", "停车", "加油",
-                                                   "地铁", "公交", "打车", "骑车",
-                                                   "哈啰", "青桔", "美团骑行", "摩拜"]):
-            return "交通出行"
-
-        # 话费充值
-        if any(keyword in text for keyword in ["话费", "充值", "通讯", "宽带",
-                                                   "移动", "联通", "电信"]):
-            return "通讯话费"
-
-        # 娱乐
-        if any(keyword in text for keyword in ["电影", "ktv", "游戏", "视频",
-                                                   "音乐", "娱乐", "腾讯视频",
-                                                   "爱奇艺", "优酷", "bilibili",
-                                                   "抖音", "快手"]):
-            return "休闲娱乐"
-
-        # 教育类
-        if any(keyword in text for keyword in ["教育", "培训", "学习", "课程",
-                                                   "书店"]):
-            return "教育培训"
-
-        # 医疗类
-        if any(keyword in text for keyword in ["医院", "药店", "诊所", "医疗",
-                                                   "健康", "药房", "体检"]):
-            return "医疗健康"
-
-        # 支付宝/微信消费
-        if "支付宝" in text or "微信" in text:
-            # 从描述中提取商户类型
-            return self._infer_consumption_type(description, counterparty)
-
-        return "未分类"
-
-    def _infer_consumption_type(self, description: str, counterparty: str) -> str:
-        """从消费描述推断具体类型"""
-        text = f"{description} {counterparty}".lower()
-
-        # 交通出行（优先检查）
-        if any(kw in text for kw in ["12306", "铁路", "火车票", "高铁", "机票",
-                                      "航空", "飞机", "携程", "去哪儿", "同程",
-                                      "飞猪", "途牛", "马蜂窝", "中铁", "铁旅",
-                                      "客运"]):
-            return "交通出行"
-
-        # 地铁公交打车
-        if any(kw in text for kw in ["地铁", "公交", "打车", "滴滴", "出租车",
-                                      "骑车", "单车", "停车", "加油", "充电",
-                                      "哈啰", "青桔", "美团骑行", "摩拜"]):
-            return "交通出行"
-
-        # 餐饮
-        if any(kw in text for kw in ["餐", "饮", "咖啡", "茶", "麦当劳", "肯德基",
-                                      "星巴克", "汉堡", "披萨", "美食", "食品", "食堂",
-                                      "喜茶", "奈雪", "瑞幸", "必胜客", "华莱士",
-                                      "海底捞", "霸王茶姬", "茶百道", "蜜雪冰城",
-                                      "沪上阿姨"]):
-            return "餐饮美食"
-
-        # 超市购物
-        if any(kw in text for kw in ["超市", "便利店", "屈臣氏", "沃尔玛", "家乐福",
-                                      "永辉", "盒马", "百货", "购物", "苏果", "大润发",
-                                      "物美", "ole", "山姆", "美宜佳", "罗森",
-                                      "7-11", "全家"]):
-            return "购物消费"
-
-        # 电商平台
-        if any(kw in text for kw in ["京东", "淘宝", "天猫", "拼多多", "抖音",
-                                      "小红书", "苏宁", "国美"]):
-            return "购物消费"
-
-        # 生活日用
-        if any(kw in text for kw in ["日用", "家居", "生活", "零食", "有鸣"]):
-            return "生活日用"
-
-        # 服饰美容
-        if any(kw in text for kw in ["服装", "服饰", "鞋", "帽", "美容", "美发",
-                                      "美甲", "化妆", "bag", "shop", "store",
-                                      "护肤品"]):
-            return "服饰美容"
-
-        # 娱乐
-        if any(kw in text for kw in ["电影", "ktv", "游戏", "视频", "音乐", "娱乐",
-                                      "腾讯视频", "爱奇艺", "优酷", "bilibili",
-                                      "抖音", "快手"]):
-            return "休闲娱乐"
-
-        # 通讯
-        if any(kw in text for kw in ["话费", "充值", "通讯", "宽带", "流量",
-                                      "移动", "联通", "电信"]):
-            return "通讯话费"
-
-        # 教育
-        if any(kw in text for kw in ["教育", "培训", "学习", "课程", "书店"]):
-            return "教育培训"
+        text = (summary + " " + description + " " + counterparty).str.lower()
+        # 消费类交易只看描述和对方
+        consumption_type = self._infer_consumption_types(description, counterparty)
+        # 转账、各分类关键词、支付宝/微信（值为 None）按优先级匹配
+        text_category = match_keywords_series(
+            text, self._category_automaton, default="未分类"
+        )
 
-        # 医疗
-        if any(kw in text for kw in ["医院", "药店", "诊所", "医疗", "健康",
-                                      "药房", "体检"]):
-            return "医疗健康"
+        # 摘要取值很少，同样只对去重后的摘要各扫描一次（未命中为空字符串）
+        summary_rule = match_keywords_series(summary, self._summary_automaton, default="")
+
+        conditions = [
+            # 根据摘要直接判断：消费 -> 进一步判断消费类型
+            summary_rule.isna(),
+            # 存取款类：存入通常是转账，取现不计入消费
+            summary_rule.ne(""),
+            # 支付宝/微信消费：从描述中提取商户类型
+            text_category.isna(),
+        ]
+        choices = [consumption_type, summary_rule, consumption_type]
+
+        return pd.Series(
+            np.select(conditions, choices, default=text_category.to_numpy()),
+            index=df.index,
+            dtype=object,
+        )
 
-        return "购物消费"  # 默认归类为购物消费
+    def _infer_consumption_types(self, description: pd.Series, counterparty: pd.Series) -> pd.Series:
+        """从消费描述批量推断具体类型，未命中任何规则的默认归类为购物消费"""
+        text = (description + " " + counterparty).str.lower()
+        return match_keywords_series(text, self._consumption_automaton, default="购物消费")
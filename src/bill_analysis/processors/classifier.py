@@ -1,8 +1,9 @@
 """交易分类模块"""
 
 import pandas as pd
-import re
-from typing import Dict, List, Optional
+from typing import Dict
+
+from ..keywords import build_keyword_automaton, match_keywords_series
 
 
 class TransactionClassifier:
@@ -55,17 +56,22 @@ class TransactionClassifier:
         ],
     }
 
+    # 参与分类匹配的文本字段（按拼接顺序排列）
+    TEXT_FIELDS = ["商品描述", "对方", "原始描述", "类型"]
+
+    # 常见的固定费用金额（可能是充值）
+    FIXED_FEE_AMOUNTS = [10, 20, 30, 50, 100, 200]
+
+    # 固定费用对应的充值类关键词
+    FIXED_FEE_PATTERN = "话费|流量|充值"
+
     def __init__(self):
         """初始化分类器"""
-        # 编译正则表达式以提高性能
-        self._compiled_patterns = self._compile_patterns()
-
-    def _compile_patterns(self) -> Dict[str, List[re.Pattern]]:
-        """编译正则表达式模式"""
-        compiled = {}
-        for category, keywords in self.CATEGORY_RULES.items():
-            compiled[category] = [re.compile(keyword, re.IGNORECASE) for keyword in keywords]
-        return compiled
+        # 构建关键词自动机以提高性能（分类顺序即匹配优先级，匹配不区分大小写）
+        self._automaton = build_keyword_automaton(
+            (category, [keyword.lower() for keyword in keywords])
+            for category, keywords in self.CATEGORY_RULES.items()
+        )
 
     def classify(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -80,48 +86,46 @@ class TransactionClassifier:
         if df.empty:
             return df
 
-        result = df.copy()
+        result = df.copy(deep=False)
 
-        # 如果已有分类，尝试补充未分类的
+        # 如果已有分类，只补充未分类的交易
         if "分类" in result.columns:
-            result["分类"] = result.apply(
-                lambda row: row["分类"] if row["分类"] != "未分类" else self._classify_transaction(row),
-                axis=1
-            )
+            categories = result["分类"].astype(object)
+            pending = categories == "未分类"
         else:
-            result["分类"] = result.apply(self._classify_transaction, axis=1)
+            categories = pd.Series("未分类", index=result.index, dtype=object)
+            pending = pd.Series(True, index=result.index)
+
+        if pending.any():
+            categories[pending] = self._classify_transactions(result[pending])
+
+        result["分类"] = categories.astype("category")
 
         return result
 
-    def _classify_transaction(self, row: pd.Series) -> str:
+    def _classify_transactions(self, df: pd.DataFrame) -> pd.Series:
         """
-        对单笔交易进行分类
+        批量对交易进行分类
+
+        拼接各文本字段后用关键词自动机匹配，相同的文本只扫描一次
 
         Args:
-            row: 交易记录
+            df: 交易数据
 
         Returns:
-            分类名称
+            与 df 索引对齐的分类名称（未匹配到的为"未分类"）
         """
-        # 检查多个字段的组合
-        fields_to_check = ["商品描述", "对方", "原始描述", "类型"]
+        # 收集所有可能的文本：非空字段各自以空格开头依次拼接
+        combined_text = pd.Series("", index=df.index, dtype=object)
+        for field in self.TEXT_FIELDS:
+            if field in df.columns:
+                values = df[field]
+                combined_text += (" " + values.astype(str)).where(values.notna(), "")
 
-        # 收集所有可能的文本
-        combined_text = ""
-        for field in fields_to_check:
-            if field in row and pd.notna(row[field]):
-                combined_text += " " + str(row[field])
+        combined_text = combined_text.str.strip().str.lower()
 
-        combined_text = combined_text.strip().lower()
-
-        # 按优先级匹配分类
-        for category, patterns in self._compiled_patterns.items():
-            for pattern in patterns:
-                if pattern.search(combined_text):
-                    return category
-
-        # 如果没有匹配到，返回未分类
-        return "未分类"
+        # 按优先级匹配分类，没有匹配到的返回未分类
+        return match_keywords_series(combined_text, self._automaton, default="未分类")
 
     def classify_by_amount(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -137,27 +141,22 @@ class TransactionClassifier:
         Returns:
             更新分类后的数据
         """
-        result = df.copy()
-
-        def adjust_category(row: pd.Series) -> str:
-            # 如果已经是明确分类，不调整
-            if row["分类"] != "未分类":
-                return row["分类"]
-
-            amount = abs(float(row["金额"]))
-
-            # 检查是否为整数（可能是转账或特殊费用）
-            if amount == int(amount) and amount > 0:
-                # 常见的固定费用
-                if amount in [10, 20, 30, 50, 100, 200]:
-                    # 可能是充值或固定费用
-                    desc = str(row.get("原始描述", "")).lower()
-                    if any(keyword in desc for keyword in ["话费", "流量", "充值"]):
-                        return "房屋物业"  # 话费归为房屋物业类
+        result = df.copy(deep=False)
 
-            return row["分类"]
+        # 整列计算掩码：未分类、金额为常见的固定费用、描述中含充值类关键词
+        amount = result["金额"].abs()
+        if "原始描述" in result.columns:
+            desc = result["原始描述"].astype(str).str.lower()
+            desc_mask = desc.str.contains(self.FIXED_FEE_PATTERN, regex=True, na=False)
+        else:
+            desc_mask = pd.Series(False, index=result.index)
+        target = (result["分类"] == "未分类") & amount.isin(self.FIXED_FEE_AMOUNTS) & desc_mask
 
-        result["分类"] = result.apply(adjust_category, axis=1)
+        if target.any():
+            categories = result["分类"]
+            if isinstance(categories.dtype, pd.CategoricalDtype) and "房屋物业" not in categories.cat.categories:
+                categories = categories.cat.add_categories("房屋物业")
+            result["分类"] = categories.mask(target, "房屋物业")  # 话费归为房屋物业类
 
         return result
 
@@ -174,16 +173,15 @@ class TransactionClassifier:
         if "分类" not in df.columns:
             return pd.DataFrame()
 
+        # 只对金额列做具名聚合，直接得到扁平列名，无需展开 MultiIndex 列再重命名
         stats = (
-            df.groupby("分类")
-            .agg({"金额": ["count", "sum", "mean"]})
+            df.groupby("分类", observed=True)["金额"]
+            .agg(交易次数="count", 总金额="sum", 平均金额="mean")
             .reset_index()
         )
 
-        stats.columns = ["分类", "交易次数", "总金额", "平均金额"]
-
         # 按总金额降序排序
-        stats = stats.sort_values("总金额", ascending=True).reset_index(drop=True)
+        stats = stats.sort_values("总金额", ascending=True, ignore_index=True)
 
         return stats
 
@@ -198,10 +196,16 @@ class TransactionClassifier:
         Returns:
             合并分类后的数据
         """
-        result = df.copy()
+        result = df.copy(deep=False)
 
-        result["分类"] = result["分类"].apply(
-            lambda x: mapping.get(str(x), x) if pd.notna(x) else x
-        )
+        # 只对不同的分类名称查一次映射（分类类型直接取其类别），再整列映射回去
+        categories = result["分类"]
+        if isinstance(categories.dtype, pd.CategoricalDtype):
+            values = categories.cat.categories
+        else:
+            values = categories.dropna().unique()
+        lookup = {value: mapping.get(str(value), value) for value in values}
+
+        result["分类"] = categories.map(lookup)
 
         return result
@@ -1,5 +1,7 @@
 """数据清洗模块"""
 
+import re
+import numpy as np
 import pandas as pd
 from typing import List
 
@@ -27,9 +29,60 @@ class DataCleaner:
         "红包",  # 红包通常不计入消费
     ]
 
+    # 分类名称映射
+    CATEGORY_MAPPING = {
+        # 餐饮类
+        "餐饮": "餐饮美食",
+        "美食": "餐饮美食",
+        "吃饭": "餐饮美食",
+        "外卖": "餐饮美食",
+        # 购物类
+        "购物": "购物消费",
+        "百货": "购物消费",
+        "超市": "购物消费",
+        "便利店": "购物消费",
+        "服饰": "服饰美容",
+        "美妆": "服饰美容",
+        "美容": "服饰美容",
+        # 交通类
+        "交通": "交通出行",
+        "出行": "交通出行",
+        "打车": "交通出行",
+        "地铁": "交通出行",
+        "公交": "交通出行",
+        "停车": "交通出行",
+        "加油": "交通出行",
+        # 娱乐类
+        "娱乐": "休闲娱乐",
+        "休闲": "休闲娱乐",
+        "电影": "休闲娱乐",
+        "游戏": "休闲娱乐",
+        "KTV": "休闲娱乐",
+        # 医疗类
+        "医疗": "医疗健康",
+        "医院": "医疗健康",
+        "药店": "医疗健康",
+        # 教育类
+        "教育": "教育培训",
+        "培训": "教育培训",
+        "学习": "教育培训",
+        # 居住类
+        "住房": "房屋物业",
+        "房租": "房屋物业",
+        "物业": "房屋物业",
+        "水电": "水电煤",
+        "燃气": "水电煤",
+        "水费": "水电煤",
+        "电费": "水电煤",
+    }
+
+    # 检查中转关键词的字段
+    TRANSFER_FIELDS = ["原始描述", "商品描述", "对方", "类型", "分类"]
+
     def __init__(self):
         """初始化数据清洗器"""
-        pass
+        # 中转关键词合并为一个按字面匹配的多选正则
+        self._transfer_pattern = "|".join(re.escape(keyword) for keyword in self.TRANSFER_KEYWORDS)
 
     def clean(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -50,18 +103,15 @@ class DataCleaner:
         if df.empty:
             return df
 
-        # 复制数据
-        cleaned = df.copy()
-
-        # 1. 移除关键列为空的记录
-        cleaned = cleaned.dropna(subset=["时间", "金额"])
+        # 1. 移除关键列为空的记录（各步筛选均返回新对象，无需先复制整份数据）
+        cleaned = df.dropna(subset=["时间", "金额"])
 
         # 2. 过滤中转交易
         cleaned = self._filter_transfer_transactions(cleaned)
 
         # 3. 只保留支出记录（用于消费分析）
         # 如果需要分析收入，可以根据需求修改
-        cleaned = cleaned[cleaned["金额"] < 0].copy()
+        cleaned = cleaned[cleaned["金额"] < 0]
 
         # 4. 移除金额为0的记录
         cleaned = cleaned[cleaned["金额"] != 0]
@@ -84,31 +134,36 @@ class DataCleaner:
         Returns:
             过滤后的交易数据
         """
-        # 过滤条件函数
-        def is_transfer_transaction(row: pd.Series) -> bool:
-            """判断是否为中转交易"""
-            # 检查多个字段
-            fields_to_check = ["原始描述", "商品描述", "对方", "类型", "分类"]
+        # 逐个字段整列匹配中转关键词（精确匹配或词组匹配），任一字段命中即为中转交易
+        mask = np.zeros(len(df), dtype=bool)
+        for field in self.TRANSFER_FIELDS:
+            if field in df.columns:
+                mask |= self._contains_transfer_keyword(df[field])
 
-            for field in fields_to_check:
-                if field in row and pd.notna(row[field]):
-                    value = str(row[field])
+        # 保留非中转交易
+        filtered = df[~mask]
 
-                    # 检查是否包含中转关键词
-                    for keyword in self.TRANSFER_KEYWORDS:
-                        # 精确匹配或词组匹配
-                        if keyword in value:
-                            return True
+        return filtered
 
-            return False
+    def _contains_transfer_keyword(self, values: pd.Series) -> np.ndarray:
+        """
+        判断每个值是否包含中转关键词
 
-        # 应用过滤
-        mask = df.apply(is_transfer_transaction, axis=1)
+        分类类型的列只对类别逐个匹配，再按整数编码取回结果
 
-        # 保留非中转交易
-        filtered = df[~mask].copy()
+        Args:
+            values: 要检查的列
 
-        return filtered
+        Returns:
+            布尔数组（缺失值为 False）
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories.to_series().astype(str)
+            hits = categories.str.contains(self._transfer_pattern, regex=True).to_numpy()
+            # 缺失值的编码为 -1，在末尾补一个 False 供其取用
+            return np.append(hits, False)[values.cat.codes.to_numpy()]
+
+        return values.str.contains(self._transfer_pattern, regex=True, na=False).to_numpy(dtype=bool)
 
     def remove_by_amount_range(
         self, df: pd.DataFrame, min_amount: float = 0.01, max_amount: float = 1000000
@@ -125,7 +180,7 @@ class DataCleaner:
             过滤后的交易数据
         """
         mask = (df["金额"].abs() >= min_amount) & (df["金额"].abs() <= max_amount)
-        return df[mask].copy()
+        return df[mask]
 
     def remove_by_time_range(
         self, df: pd.DataFrame, start_time=None, end_time=None
@@ -147,7 +202,7 @@ class DataCleaner:
         if end_time is not None:
             df = df[df["时间"] <= end_time]
 
-        return df.copy()
+        return df.copy(deep=False)
 
     def normalize_categories(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -159,56 +214,14 @@ class DataCleaner:
         Returns:
             分类标准化后的数据
         """
-        # 定义分类映射
-        category_mapping = {
-            # 餐饮类
-            "餐饮": "餐饮美食",
-            "美食": "餐饮美食",
-            "吃饭": "餐饮美食",
-            "外卖": "餐饮美食",
-            # 购物类
-            "购物": "购物消费",
-            "百货": "购物消费",
-            "超市": "购物消费",
-            "便利店": "购物消费",
-            "服饰": "服饰美容",
-            "美妆": "服饰美容",
-            "美容": "服饰美容",
-            # 交通类
-            "交通": "交通出行",
-            "出行": "交通出行",
-            "打车": "交通出行",
-            "地铁": "交通出行",
-            "公交": "交通出行",
-            "停车": "交通出行",
-            "加油": "交通出行",
-            # 娱乐类
-            "娱乐": "休闲娱乐",
-            "休闲": "休闲娱乐",
-            "电影": "休闲娱乐",
-            "游戏": "休闲娱乐",
-            "KTV": "休闲娱乐",
-            # 医疗类
-            "医疗": "医疗健康",
-            "医院": "医疗健康",
-            "药店": "医疗健康",
-            # 教育类
-            "教育": "教育培训",
-            "培训": "教育培训",
-            "学习": "教育培训",
-            # 居住类
-            "住房": "房屋物业",
-            "房租": "房屋物业",
-            "物业": "房屋物业",
-            "水电": "水电煤",
-            "燃气": "水电煤",
-            "水费": "水电煤",
-            "电费": "水电煤",
-        }
 
-        # 应用映射
-        df["分类"] = df["分类"].apply(
-            lambda x: category_mapping.get(str(x).strip(), str(x).strip()) if pd.notna(x) else "未分类"
-        )
+        # 只对去重后的分类名称逐个映射，再整列映射回去（在浅拷贝上替换列，不修改原数据）
+        result = df.copy(deep=False)
+        categories = result["分类"].astype(object)
+        lookup = {
+            category: self.CATEGORY_MAPPING.get(str(category).strip(), str(category).strip())
+            for category in categories.dropna().unique()
+        }
+        result["分类"] = categories.map(lookup).fillna("未分类")
 
-        return df
+        return result
@@ -1,5 +1,7 @@
 """数据去重模块"""
 
+import re
+import numpy as np
 import pandas as pd
 from typing import Tuple, List
 
@@ -7,10 +9,19 @@ from typing import Tuple, List
 class Deduplicator:
     """交易去重器"""
 
+    # 银行记录中表示转到支付平台的关键词
+    BANK_TRANSFER_PATTERN = "支付宝|微信|财付通"
+
+    # 支付平台记录中表示提现到银行的关键词
+    WITHDRAW_PATTERN = "提现|转入银行|银行卡"
+
     def __init__(self):
         """初始化去重器"""
         # 优先级平台：优先保留微信和支付宝的交易记录
         self.platform_priority = {"微信": 1, "支付宝": 2, "建设银行": 3}
+        # 编译平台间转账关键词正则以提高性能
+        self._bank_transfer_re = re.compile(self.BANK_TRANSFER_PATTERN)
+        self._withdraw_re = re.compile(self.WITHDRAW_PATTERN)
 
     def deduplicate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
@@ -30,58 +41,57 @@ class Deduplicator:
         if df.empty:
             return df, pd.DataFrame()
 
-        # 复制数据
-        data = df.copy()
-
         # 生成去重键
-        data["dedup_key"] = self._generate_dedup_key(data)
-
-        # 按优先级排序（优先保留高优先级平台）
-        data["priority"] = data["平台"].map(self.platform_priority)
-        data = data.sort_values("priority")
-
-        # 标记重复项
-        data["is_duplicate"] = data.duplicated(subset=["dedup_key"], keep="first")
+        dedup_key = self._generate_dedup_key(df)
 
-        # 分离去重后的数据和重复数据
-        deduped = data[~data["is_duplicate"]].copy()
-        duplicates = data[data["is_duplicate"]].copy()
+        # 按优先级排序（优先保留高优先级平台），只对优先级排序得到行号，不复制数据、不添加辅助列
+        # 平台列可能是分类类型，map 结果需转为数值才能按优先级排序
+        priority = pd.Series(df["平台"].map(self.platform_priority).astype(float).to_numpy())
+        order = priority.sort_values().index.to_numpy()
 
-        # 移除辅助列
-        deduped = deduped.drop(columns=["dedup_key", "priority", "is_duplicate"])
-        duplicates = duplicates.drop(columns=["dedup_key", "priority", "is_duplicate"])
+        # 标记重复项（按排序后的顺序保留第一次出现的）
+        is_duplicate = dedup_key.take(order).duplicated(keep="first").to_numpy()
 
-        # 重置索引
-        deduped = deduped.reset_index(drop=True)
-        duplicates = duplicates.reset_index(drop=True)
+        # 按行号分离去重后的数据和重复数据，并重置索引
+        deduped = df.iloc[order[~is_duplicate]].reset_index(drop=True)
+        duplicates = df.iloc[order[is_duplicate]].reset_index(drop=True)
 
         return deduped, duplicates
 
-    def _generate_dedup_key(self, df: pd.DataFrame) -> pd.Series:
+    def _generate_dedup_key(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成去重键
 
-        去重键基于：时间（精确到分钟）+ 金额 + 对方
+        去重键基于：时间（精确到分钟）+ 金额 + 对方。三部分各自作为一列
+        （时间为 datetime，金额与对方为整数编码），由 pandas 直接对多列判重，
+        不再为每行拼接字符串
 
         Args:
             df: 交易数据
 
         Returns:
-            去重键 Series
+            与 df 行顺序一致的去重键 DataFrame（"时间"、"金额"、"对方" 三列）
         """
-        def make_key(row: pd.Series) -> str:
-            # 时间精确到分钟（去除秒的差异）
-            time_key = str(row["时间"])[:16] if pd.notna(row["时间"]) else ""
-
-            # 金额（保留2位小数）
-            amount_key = f"{abs(float(row['金额'])):.2f}" if pd.notna(row["金额"]) else ""
-
-            # 对方（去除空格）
-            party_key = str(row["对方"]).strip() if pd.notna(row["对方"]) else ""
-
-            return f"{time_key}|{amount_key}|{party_key}"
-
-        return df.apply(make_key, axis=1)
+        # 时间精确到分钟（去除秒的差异）
+        times = df["时间"]
+        if pd.api.types.is_datetime64_any_dtype(times):
+            time_key = times.dt.floor("min").to_numpy()
+        else:
+            time_key = times.astype(str).str[:16].where(times.notna(), "").to_numpy()
+
+        # 金额（保留2位小数）：只对去重后的金额格式化一次，格式化结果相同的金额编码相同
+        amount_codes, amount_values = pd.factorize(df["金额"].astype(float).abs())
+        _, text_codes = np.unique([f"{amount:.2f}" for amount in amount_values], return_inverse=True)
+        # 缺失值的编码为 -1，在末尾补一个 -1 供其取用（缺失金额之间视为相同）
+        amount_key = np.append(text_codes, -1)[amount_codes]
+
+        # 对方（去除空格）：商户重复出现，只对去重后的对方名称处理一次，再按编码取回
+        codes, uniques = pd.factorize(df["对方"])
+        labels = pd.Series(uniques).astype(str).str.strip().to_numpy(dtype=object)
+        # 缺失值按空字符串处理，与去除空格后为空的名称视为相同
+        party_key, _ = pd.factorize(np.append(labels, "")[codes])
+
+        return pd.DataFrame({"时间": time_key, "金额": amount_key, "对方": party_key})
 
     def deduplicate_by_time_window(
         self, df: pd.DataFrame, window_minutes: int = 5
@@ -89,7 +99,8 @@ class Deduplicator:
         """
         基于时间窗口去重
 
-        在指定时间窗口内，如果金额和对方相同，视为重复交易
+        在指定时间窗口内，如果金额和对方相同，视为重复交易。
+        先按金额和对方分组，只在组内按时间顺序比较，避免对所有行两两比较
 
         Args:
             df: 交易数据
@@ -104,41 +115,44 @@ class Deduplicator:
         # 按时间排序
         df = df.sort_values("时间").reset_index(drop=True)
 
+        times = df["时间"]
+        timestamps = times.to_numpy(dtype="datetime64[ns]").view("int64")
+        window_ns = window_minutes * 60 * 1e9
+        priorities = df["平台"].map(self.platform_priority).astype(float).fillna(99).to_numpy()
+
+        # 只有金额绝对值和对方都相同的交易才可能重复：按二者分组（缺失值不参与分组），
+        # 各组内的行号按时间升序排列
+        amounts = df["金额"].abs().where(times.notna())
+        groups = df.groupby([amounts, "对方"], sort=False, observed=True).indices
+
         # 标记要删除的行
-        to_remove = set()
+        to_remove = np.zeros(len(df), dtype=bool)
 
-        for i in range(len(df)):
-            if i in to_remove:
+        for positions in groups.values():
+            if len(positions) < 2:
                 continue
 
-            for j in range(i + 1, len(df)):
-                if j in to_remove:
+            for k, i in enumerate(positions):
+                if to_remove[i]:
                     continue
 
-                # 计算时间差
-                time_diff = (df.loc[j, "时间"] - df.loc[i, "时间"]).total_seconds() / 60
+                for j in positions[k + 1:]:
+                    if to_remove[j]:
+                        continue
 
-                # 超出时间窗口，停止检查
-                if time_diff > window_minutes:
-                    break
+                    # 超出时间窗口，停止检查
+                    if timestamps[j] - timestamps[i] > window_ns:
+                        break
 
-                # 检查金额和对方是否相同
-                if (
-                    abs(df.loc[i, "金额"]) == abs(df.loc[j, "金额"])
-                    and df.loc[i, "对方"] == df.loc[j, "对方"]
-                ):
                     # 比较平台优先级，移除低优先级的
-                    priority_i = self.platform_priority.get(df.loc[i, "平台"], 99)
-                    priority_j = self.platform_priority.get(df.loc[j, "平台"], 99)
-
-                    if priority_i <= priority_j:
-                        to_remove.add(j)
+                    if priorities[i] <= priorities[j]:
+                        to_remove[j] = True
                     else:
-                        to_remove.add(i)
+                        to_remove[i] = True
                         break
 
         # 返回去重后的数据
-        result = df[~df.index.isin(to_remove)].copy()
+        result = df[~to_remove]
         return result.reset_index(drop=True)
 
     def merge_platform_transfers(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -157,26 +171,40 @@ class Deduplicator:
         # 这个方法用于识别并标记平台间资金流动
         # 实际的合并逻辑在 DataCleaner 中通过过滤中转交易实现
 
-        # 标记可能的平台间转账
-        def is_platform_transfer(row: pd.Series) -> bool:
-            desc = str(row.get("原始描述", "")).lower()
-            party = str(row.get("对方", "")).lower()
-
-            # 银行转到支付平台
-            if row["平台"] == "建设银行":
-                if any(keyword in desc or keyword in party for keyword in ["支付宝", "微信", "财付通"]):
-                    return True
-
-            # 支付平台提现到银行
-            if row["平台"] in ["支付宝", "微信"]:
-                if any(keyword in desc for keyword in ["提现", "转入银行", "银行卡"]):
-                    return True
-
-            return False
-
-        df["is_platform_transfer"] = df.apply(is_platform_transfer, axis=1)
-
-        return df
+        # 标记可能的平台间转账：先按平台划分行，每行只需匹配所属平台对应的关键词，
+        # 描述列中的每条文本最多扫描一次
+        platform = df["平台"]
+        is_bank = platform.eq("建设银行").to_numpy(dtype=bool)
+        is_payment = platform.isin(["支付宝", "微信"]).to_numpy(dtype=bool)
+        is_transfer = np.zeros(len(df), dtype=bool)
+
+        # 银行转到支付平台
+        if is_bank.any():
+            bank = df[is_bank]
+            is_transfer[is_bank] = (
+                self._text_column(bank, "原始描述").str.contains(self._bank_transfer_re)
+                | self._text_column(bank, "对方").str.contains(self._bank_transfer_re)
+            ).to_numpy(dtype=bool)
+
+        # 支付平台提现到银行
+        if is_payment.any():
+            payment = df[is_payment]
+            is_transfer[is_payment] = (
+                self._text_column(payment, "原始描述").str.contains(self._withdraw_re).to_numpy(dtype=bool)
+            )
+
+        # 浅拷贝：只添加标记列，不修改原数据
+        result = df.copy(deep=False)
+        result["is_platform_transfer"] = is_transfer
+
+        return result
+
+    @staticmethod
+    def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+        """取出文本列并转为字符串（列不存在时为空字符串）"""
+        if column not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[column].astype(str)
 
     def get_duplicate_summary(self, duplicates: pd.DataFrame) -> dict:
         """
@@ -186,7 +214,7 @@ class Deduplicator:
             duplicates: 被移除的重复数据
 
         Returns:
-            重复交易摘要
+            重复交易摘要，by_platform 以平台为键：{平台: {"count": 笔数, "sum": 金额}}
         """
         if duplicates.empty:
             return {"total_duplicates": 0, "by_platform": {}}
@@ -194,7 +222,11 @@ class Deduplicator:
         summary = {
             "total_duplicates": len(duplicates),
             "total_amount": duplicates["金额"].sum(),
-            "by_platform": duplicates.groupby("平台")["金额"].agg(["count", "sum"]).to_dict(),
+            "by_platform": (
+                duplicates.groupby("平台", sort=False, observed=True)["金额"]
+                .agg(["count", "sum"])
+                .to_dict(orient="index")
+            ),
         }
 
         return summary
@@ -1,6 +1,15 @@
 """报告生成模块"""
 
-from .visualizer import Visualizer
 from .generator import ReportGenerator
+from .svg_visualizer import SVGVisualizer
 
-__all__ = ["Visualizer", "ReportGenerator"]
+__all__ = ["Visualizer", "SVGVisualizer", "ReportGenerator"]
+
+
+def __getattr__(name: str):
+    """按需导入 Visualizer，只用到报告导出等功能时不加载 matplotlib"""
+    if name == "Visualizer":
+        from .visualizer import Visualizer
+
+        return Visualizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,196 +2,141 @@
 
 import pandas as pd
 from datetime import datetime
+from html import escape
 from typing import Dict, Optional
 import os
-from .visualizer import Visualizer
 
 
 class ReportGenerator:
     """报告生成器"""
 
-    def __init__(self, output_dir: str = "data/output"):
-        """
-        初始化报告生成器
-
-        Args:
-            output_dir: 输出目录
-        """
-        self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
-        self.visualizer = Visualizer(output_dir)
-
-    def generate_html_report(
-        self, analysis_result: Dict, df: pd.DataFrame, filename: str = "annual_report.html"
-    ) -> str:
-        """
-        生成 HTML 格式的年度报告
-
-        Args:
-            analysis_result: 分析结果
-            df: 清洗后的交易数据
-            filename: 输出文件名
-
-        Returns:
-            输出文件完整路径
-        """
-        # 生成图表
-        charts = self.visualizer.plot_all_charts(analysis_result)
-
-        # 生成 HTML
-        html_content = self._build_html_content(analysis_result, df, charts)
-
-        # 保存文件
-        output_path = os.path.join(self.output_dir, filename)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
-
-        return output_path
-
-    def _build_html_content(
-        self, analysis_result: Dict, df: pd.DataFrame, charts: Dict[str, str]
-    ) -> str:
-        """构建 HTML 内容"""
-
-        summary = analysis_result.get("summary", {})
-        by_category = analysis_result.get("by_category", {})
-        by_platform = analysis_result.get("by_platform", {})
-        by_month = analysis_result.get("by_month", {})
-        top_merchants = analysis_result.get("top_merchants", [])
-
-        html = f"""
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>年度消费报告 - {summary.get('year', '全部')}</title>
-    <style>
-        * {{
+    # HTML 报告样式（原样嵌入页面，无需转义花括号）
+    REPORT_CSS = """\
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
 
-        body {{
+        body {
             font-family: "Microsoft YaHei", "SimHei", Arial, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             min-height: 100vh;
-        }}
+        }
 
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 20px;
             box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
             overflow: hidden;
-        }}
+        }
 
-        .header {{
+        .header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 40px;
             text-align: center;
-        }}
+        }
 
-        .header h1 {{
+        .header h1 {
             font-size: 2.5em;
             margin-bottom: 10px;
-        }}
+        }
 
-        .header p {{
+        .header p {
             font-size: 1.1em;
             opacity: 0.9;
-        }}
+        }
 
-        .content {{
+        .content {
             padding: 40px;
-        }}
+        }
 
-        .section {{
+        .section {
             margin-bottom: 40px;
-        }}
+        }
 
-        .section-title {{
+        .section-title {
             font-size: 1.8em;
             color: #333;
             border-bottom: 3px solid #667eea;
             padding-bottom: 10px;
             margin-bottom: 20px;
-        }}
+        }
 
-        .summary-cards {{
+        .summary-cards {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
             gap: 20px;
             margin-bottom: 30px;
-        }}
+        }
 
-        .card {{
+        .card {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 25px;
             border-radius: 15px;
             box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-        }}
+        }
 
-        .card h3 {{
+        .card h3 {
             font-size: 0.9em;
             opacity: 0.9;
             margin-bottom: 10px;
-        }}
+        }
 
-        .card .value {{
+        .card .value {
             font-size: 2em;
             font-weight: bold;
-        }}
+        }
 
-        .chart-container {{
+        .chart-container {
             text-align: center;
             margin: 30px 0;
-        }}
+        }
 
-        .chart-container img {{
+        .chart-container img {
             max-width: 100%;
             height: auto;
             border-radius: 10px;
             box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-        }}
+        }
 
-        .data-table {{
+        .data-table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 20px;
-        }}
+        }
 
         .data-table th,
-        .data-table td {{
+        .data-table td {
             padding: 12px;
             text-align: left;
             border-bottom: 1px solid #ddd;
-        }}
+        }
 
-        .data-table th {{
+        .data-table th {
             background: #667eea;
             color: white;
             font-weight: bold;
-        }}
+        }
 
-        .data-table tr:hover {{
+        .data-table tr:hover {
             background: #f5f5f5;
-        }}
+        }
 
-        .footer {{
+        .footer {
             text-align: center;
             padding: 20px;
             color: #666;
             font-size: 0.9em;
             border-top: 1px solid #eee;
-        }}
+        }
 
-        .badge {{
+        .badge {
             display: inline-block;
             padding: 5px 10px;
             background: #667eea;
@@ -199,8 +144,106 @@ class ReportGenerator:
             border-radius: 20px;
             font-size: 0.9em;
             margin-right: 10px;
-        }}
-    </style>
+        }
+"""
+
+    # 导出 CSV 时每次写出的行数
+    CSV_CHUNK_SIZE = 50_000
+
+    # 可选的图表后端：matplotlib（PNG 图片）或 svg（直接生成矢量图，不依赖 matplotlib）
+    CHART_BACKENDS = ("matplotlib", "svg")
+
+    def __init__(
+        self,
+        output_dir: str = "data/output",
+        chart_backend: str = "matplotlib",
+        parallel_charts: bool = False,
+    ):
+        """
+        初始化报告生成器
+
+        Args:
+            output_dir: 输出目录
+            chart_backend: 图表后端，"matplotlib" 或 "svg"
+            parallel_charts: 是否用进程池并行绘制图表（仅 matplotlib 后端生效）
+        """
+        if chart_backend not in self.CHART_BACKENDS:
+            raise ValueError(f"不支持的图表后端: {chart_backend}")
+
+        self.output_dir = output_dir
+        self.chart_backend = chart_backend
+        self.parallel_charts = parallel_charts
+        os.makedirs(output_dir, exist_ok=True)
+        # 图表生成器在首次使用时才创建（导入 matplotlib 的开销较大）
+        self._visualizer = None
+
+    @property
+    def visualizer(self):
+        """图表生成器（首次访问时按图表后端导入并创建）"""
+        if self._visualizer is None:
+            if self.chart_backend == "svg":
+                from .svg_visualizer import SVGVisualizer
+
+                self._visualizer = SVGVisualizer(self.output_dir)
+            else:
+                from .visualizer import Visualizer
+
+                self._visualizer = Visualizer(self.output_dir, parallel=self.parallel_charts)
+        return self._visualizer
+
+    def generate_html_report(
+        self,
+        analysis_result: Dict,
+        df: pd.DataFrame,
+        filename: str = "annual_report.html",
+        embed_charts: bool = False,
+    ) -> str:
+        """
+        生成 HTML 格式的年度报告
+
+        Args:
+            analysis_result: 分析结果
+            df: 清洗后的交易数据
+            filename: 输出文件名
+            embed_charts: 是否将图表以 base64 data URI 内嵌到 HTML 中（生成单文件报告，
+                不写出图片文件）
+
+        Returns:
+            输出文件完整路径
+        """
+        # 生成图表
+        charts = self.visualizer.plot_all_charts(analysis_result, inline=embed_charts)
+
+        # 生成 HTML
+        html_content = self._build_html_content(analysis_result, df, charts)
+
+        # 保存文件
+        output_path = os.path.join(self.output_dir, filename)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(html_content)
+
+        return output_path
+
+    def _build_html_content(
+        self, analysis_result: Dict, df: pd.DataFrame, charts: Dict[str, str]
+    ) -> str:
+        """构建 HTML 内容"""
+
+        summary = analysis_result.get("summary", {})
+        by_category = analysis_result.get("by_category", {})
+        by_platform = analysis_result.get("by_platform", {})
+        by_month = analysis_result.get("by_month", {})
+        top_merchants = analysis_result.get("top_merchants", [])
+
+        html = f"""
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>年度消费报告 - {summary.get('year', '全部')}</title>
+    <style>
+{self.REPORT_CSS}    </style>
 </head>
 <body>
     <div class="container">
@@ -253,23 +296,40 @@ class ReportGenerator:
 """
         return html
 
+    @staticmethod
+    def _chart_src(chart_path: str) -> str:
+        """
+        获取图表在 HTML 中引用的地址
+
+        Args:
+            chart_path: 图表文件路径或 data URI
+
+        Returns:
+            data URI 原样返回，文件路径返回相对于报告的文件名
+        """
+        if chart_path.startswith("data:"):
+            return chart_path
+        return os.path.basename(chart_path)
+
     def _generate_category_section(self, by_category: Dict, chart_path: Optional[str]) -> str:
         """生成分类部分"""
         if not by_category:
             return ""
 
-        rows = ""
+        # 需要列出全部分类，完整排序一次（分析结果按带符号总金额排序，与此处顺序不同）
+        rows = []
         for category, stats in sorted(by_category.items(), key=lambda x: x[1]["amount"], reverse=True):
-            rows += f"""
+            rows.append(f"""
             <tr>
-                <td><span class="badge">{category}</span></td>
+                <td><span class="badge">{escape(str(category))}</span></td>
                 <td>{stats['count']}</td>
                 <td>¥{stats['amount']:.2f}</td>
                 <td>¥{stats.get('average', 0):.2f}</td>
             </tr>
-            """
+            """)
 
-        chart_img = f'<img src="{os.path.basename(chart_path)}" alt="消费分类饼图">' if chart_path else ""
+        rows_html = "".join(rows)
+        chart_img = f'<img src="{self._chart_src(chart_path)}" alt="消费分类饼图">' if chart_path else ""
 
         return f"""
         <div class="section">
@@ -285,7 +345,7 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {rows}
+                    {rows_html}
                 </tbody>
             </table>
         </div>
@@ -296,18 +356,19 @@ class ReportGenerator:
         if not by_month:
             return ""
 
-        rows = ""
+        rows = []
         for month in sorted(by_month.keys()):
             stats = by_month[month]
-            rows += f"""
+            rows.append(f"""
             <tr>
                 <td>{month}</td>
                 <td>{stats['count']}</td>
                 <td>¥{stats['amount']:.2f}</td>
             </tr>
-            """
+            """)
 
-        chart_img = f'<img src="{os.path.basename(chart_path)}" alt="月度消费趋势">' if chart_path else ""
+        rows_html = "".join(rows)
+        chart_img = f'<img src="{self._chart_src(chart_path)}" alt="月度消费趋势">' if chart_path else ""
 
         return f"""
         <div class="section">
@@ -322,7 +383,7 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {rows}
+                    {rows_html}
                 </tbody>
             </table>
         </div>
@@ -333,17 +394,18 @@ class ReportGenerator:
         if not by_platform:
             return ""
 
-        rows = ""
+        rows = []
         for platform, stats in by_platform.items():
-            rows += f"""
+            rows.append(f"""
             <tr>
-                <td>{platform}</td>
+                <td>{escape(str(platform))}</td>
                 <td>{stats['count']}</td>
                 <td>¥{stats['amount']:.2f}</td>
             </tr>
-            """
+            """)
 
-        chart_img = f'<img src="{os.path.basename(chart_path)}" alt="平台消费对比">' if chart_path else ""
+        rows_html = "".join(rows)
+        chart_img = f'<img src="{self._chart_src(chart_path)}" alt="平台消费对比">' if chart_path else ""
 
         return f"""
         <div class="section">
@@ -358,7 +420,7 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {rows}
+                    {rows_html}
                 </tbody>
             </table>
         </div>
@@ -369,17 +431,19 @@ class ReportGenerator:
         if not top_merchants:
             return ""
 
-        rows = ""
+        # 分析阶段已用部分排序取出按金额降序排列的前 N 个商户，这里无需重新排序
+        rows = []
         for merchant in top_merchants[:20]:
-            rows += f"""
+            rows.append(f"""
             <tr>
-                <td>{merchant['merchant']}</td>
+                <td>{escape(str(merchant['merchant']))}</td>
                 <td>{merchant['count']}</td>
                 <td>¥{merchant['amount']:.2f}</td>
             </tr>
-            """
+            """)
 
-        chart_img = f'<img src="{os.path.basename(chart_path)}" alt="消费最多的商户">' if chart_path else ""
+        rows_html = "".join(rows)
+        chart_img = f'<img src="{self._chart_src(chart_path)}" alt="消费最多的商户">' if chart_path else ""
 
         return f"""
         <div class="section">
@@ -394,28 +458,48 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {rows}
+                    {rows_html}
                 </tbody>
             </table>
         </div>
         """
 
-    def export_to_csv(self, df: pd.DataFrame, filename: str = "cleaned_transactions.csv") -> str:
+    def export_to_csv(
+        self, df: pd.DataFrame, filename: str = "cleaned_transactions.csv", compress: bool = False
+    ) -> str:
         """
         导出清洗后的数据到 CSV
 
         Args:
             df: 交易数据
             filename: 输出文件名
+            compress: 是否使用 zstd 压缩（文件名追加 .zst，需要安装 zstd 可选依赖）
 
         Returns:
             输出文件完整路径
+
+        Raises:
+            ImportError: compress 为 True 但未安装 zstandard
         """
         output_path = os.path.join(self.output_dir, filename)
+        compression = None
+        if compress:
+            # 先确认可选依赖已安装，避免在 pandas 写出时才报出难以理解的错误
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "压缩 CSV 需要 zstandard，请安装 zstd 可选依赖: pip install 'bill-analysis[zstd]'"
+                ) from None
+            output_path += ".zst"
+            compression = {"method": "zstd", "level": 3}
 
         # 将空值替换为空字符串，确保所有字段都有值
         df_export = df.copy()
         for col in df_export.columns:
+            # 分类类型不能填充类别之外的值，先转回 object
+            if isinstance(df_export[col].dtype, pd.CategoricalDtype):
+                df_export[col] = df_export[col].astype(object)
             df_export[col] = df_export[col].fillna("")
 
         # 清理特殊字符，确保 Excel 能正确解析
@@ -433,11 +517,19 @@ class ReportGenerator:
             quoting=1,  # QUOTE_ALL - 所有字段都加引号
             quotechar='"',
             doublequote=True,
+            lineterminator="\n",
+            # 分块写出，避免一次性生成整个文件的文本
+            chunksize=self.CSV_CHUNK_SIZE,
+            compression=compression,
         )
         return output_path
 
     def generate_all_reports(
-        self, analysis_result: Dict, df: pd.DataFrame
+        self,
+        analysis_result: Dict,
+        df: pd.DataFrame,
+        embed_charts: bool = False,
+        compress_csv: bool = False,
     ) -> Dict[str, str]:
         """
         生成所有报告
@@ -445,6 +537,8 @@ class ReportGenerator:
         Args:
             analysis_result: 分析结果
             df: 清洗后的交易数据
+            embed_charts: 是否将图表内嵌到 HTML 报告中，生成单文件报告
+            compress_csv: 是否使用 zstd 压缩导出的 CSV 数据
 
         Returns:
             生成的报告文件路径字典
@@ -452,9 +546,11 @@ class ReportGenerator:
         reports = {}
 
         # HTML 报告
-        reports["html_report"] = self.generate_html_report(analysis_result, df)
+        reports["html_report"] = self.generate_html_report(
+            analysis_result, df, embed_charts=embed_charts
+        )
 
         # CSV 数据
-        reports["csv_data"] = self.export_to_csv(df)
+        reports["csv_data"] = self.export_to_csv(df, compress=compress_csv)
 
         return reports
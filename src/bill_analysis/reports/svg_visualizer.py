@@ -0,0 +1,414 @@
+"""SVG 图表模块"""
+
+import base64
+import heapq
+import math
+import os
+from html import escape
+from operator import itemgetter
+from typing import Dict, List
+
+
+class SVGVisualizer:
+    """
+    SVG 图表生成器
+
+    饼图、柱状图只由 <path>/<rect>/<text> 等基本图元构成，直接根据聚合结果用字符串模板
+    输出 SVG，不依赖 matplotlib（省去字体查找、布局计算与 PNG 编码），且为可无损缩放的矢量图。
+    接口与 Visualizer 保持一致
+    """
+
+    # 饼图配色（与 matplotlib 的 Set3 色表一致）
+    PIE_COLORS = [
+        "#8dd3c7", "#ffffb3", "#bebada", "#fb8072", "#80b1d3", "#fdb462",
+        "#b3de69", "#fccde5", "#d9d9d9", "#bc80bd", "#ccebc5", "#ffed6f",
+    ]
+
+    # 平台柱状图配色（与 matplotlib 的 Set2 色表一致）
+    BAR_COLORS = [
+        "#66c2a5", "#fc8d62", "#8da0cb", "#e78ac3",
+        "#a6d854", "#ffd92f", "#e5c494", "#b3b3b3",
+    ]
+
+    # 图表文字字体（优先使用常见中文字体）
+    FONT_FAMILY = "'Microsoft YaHei', 'PingFang SC', 'Noto Sans CJK SC', 'WenQuanYi Micro Hei', sans-serif"
+
+    # 数值坐标轴的刻度数
+    AXIS_TICKS = 5
+
+    def __init__(self, output_dir: str = "data/output"):
+        """
+        初始化可视化器
+
+        Args:
+            output_dir: 输出目录
+        """
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _save_svg(self, body: str, width: int, height: int, filename: str, inline: bool) -> str:
+        """
+        组装 SVG 文档并保存
+
+        Args:
+            body: SVG 图元
+            width: 画布宽度
+            height: 画布高度
+            filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        svg = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="{self.FONT_FAMILY}">'
+            f'<rect width="{width}" height="{height}" fill="white"/>{body}</svg>'
+        )
+
+        if inline:
+            encoded = base64.b64encode(svg.encode("utf-8")).decode("ascii")
+            return f"data:image/svg+xml;base64,{encoded}"
+
+        output_path = os.path.join(self.output_dir, filename)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(svg)
+
+        return output_path
+
+    @staticmethod
+    def _title(text: str, width: int) -> str:
+        """生成居中的图表标题"""
+        return (
+            f'<text x="{width / 2:.1f}" y="32" text-anchor="middle" font-size="20" '
+            f'font-weight="bold">{escape(text)}</text>'
+        )
+
+    def _value_grid(
+        self, max_value: float, left: float, right: float, top: float, bottom: float
+    ) -> List[str]:
+        """
+        生成纵向数值坐标轴的网格线与刻度标签
+
+        Args:
+            max_value: 坐标轴最大值
+            left: 绘图区左边界
+            right: 绘图区右边界
+            top: 绘图区上边界
+            bottom: 绘图区下边界
+
+        Returns:
+            SVG 图元列表
+        """
+        parts = []
+        for i in range(self.AXIS_TICKS + 1):
+            value = max_value * i / self.AXIS_TICKS
+            y = bottom - (bottom - top) * i / self.AXIS_TICKS
+            parts.append(
+                f'<line x1="{left}" y1="{y:.1f}" x2="{right}" y2="{y:.1f}" stroke="#ccc" '
+                f'stroke-dasharray="4 4"/>'
+                f'<text x="{left - 8}" y="{y + 4:.1f}" text-anchor="end" font-size="11">'
+                f"{value:.0f}</text>"
+            )
+        return parts
+
+    def plot_category_pie(
+        self, category_data: Dict, filename: str = "category_pie.svg", inline: bool = False
+    ) -> str:
+        """
+        绘制消费分类饼图
+
+        Args:
+            category_data: 分类数据 {分类名: {amount: 金额}}
+            filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        # 准备数据
+        items = [(category, stats["amount"]) for category, stats in category_data.items()
+                 if stats["amount"] > 0]
+
+        if not items:
+            return ""
+
+        width, height = 900, 520
+        cx, cy, radius = 260, 280, 200
+        total = sum(amount for _, amount in items)
+
+        parts = [self._title("消费分类占比", width)]
+
+        # 从正上方开始逆时针排列扇区（与 matplotlib 的 startangle=90 一致）
+        angle = math.pi / 2
+        for i, (category, amount) in enumerate(items):
+            color = self.PIE_COLORS[i % len(self.PIE_COLORS)]
+            share = amount / total
+            end = angle + 2 * math.pi * share
+
+            if share >= 1:
+                parts.append(f'<circle cx="{cx}" cy="{cy}" r="{radius}" fill="{color}"/>')
+            else:
+                x1, y1 = cx + radius * math.cos(angle), cy - radius * math.sin(angle)
+                x2, y2 = cx + radius * math.cos(end), cy - radius * math.sin(end)
+                large_arc = 1 if share > 0.5 else 0
+                parts.append(
+                    f'<path d="M{cx},{cy} L{x1:.2f},{y1:.2f} '
+                    f'A{radius},{radius} 0 {large_arc},0 {x2:.2f},{y2:.2f} Z" '
+                    f'fill="{color}" stroke="white"/>'
+                )
+
+            # 百分比标在扇区中部
+            middle = (angle + end) / 2
+            lx, ly = cx + radius * 0.6 * math.cos(middle), cy - radius * 0.6 * math.sin(middle)
+            parts.append(
+                f'<text x="{lx:.1f}" y="{ly:.1f}" text-anchor="middle" font-size="11" '
+                f'font-weight="bold" fill="#333">{share * 100:.1f}%</text>'
+            )
+            angle = end
+
+        # 图例
+        legend_x, legend_y = 500, 100
+        parts.append(
+            f'<text x="{legend_x}" y="{legend_y - 12}" font-size="13" font-weight="bold">消费金额</text>'
+        )
+        for i, (category, amount) in enumerate(items):
+            y = legend_y + i * 22
+            color = self.PIE_COLORS[i % len(self.PIE_COLORS)]
+            parts.append(
+                f'<rect x="{legend_x}" y="{y}" width="14" height="14" fill="{color}"/>'
+                f'<text x="{legend_x + 20}" y="{y + 12}" font-size="12">'
+                f"{escape(str(category))}: ¥{amount:.2f}</text>"
+            )
+
+        return self._save_svg("".join(parts), width, max(height, legend_y + len(items) * 22 + 20),
+                              filename, inline)
+
+    def plot_monthly_trend(
+        self, monthly_data: Dict, filename: str = "monthly_trend.svg", inline: bool = False
+    ) -> str:
+        """
+        绘制月度消费趋势图
+
+        Args:
+            monthly_data: 月度数据 {月份: {amount: 金额}}
+            filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        # 准备数据
+        months = sorted(monthly_data.keys())
+        amounts = [abs(monthly_data[m]["amount"]) for m in months]
+
+        if not months:
+            return ""
+
+        width, height = 1000, 500
+        left, right, top, bottom = 90, width - 30, 70, height - 90
+        max_value = max(amounts) * 1.15 or 1
+        slot = (right - left) / len(months)
+
+        def to_y(value: float) -> float:
+            return bottom - (bottom - top) * value / max_value
+
+        parts = [self._title("月度消费趋势", width)]
+        parts.extend(self._value_grid(max_value, left, right, top, bottom))
+
+        centers = [left + slot * (i + 0.5) for i in range(len(months))]
+        points = " ".join(f"{x:.1f},{to_y(a):.1f}" for x, a in zip(centers, amounts))
+
+        # 填充区域与月份标签
+        parts.append(
+            f'<polygon points="{centers[0]:.1f},{bottom} {points} {centers[-1]:.1f},{bottom}" '
+            f'fill="#2E86AB" fill-opacity="0.3"/>'
+        )
+        for x, month in zip(centers, months):
+            parts.append(
+                f'<text x="{x:.1f}" y="{bottom + 16}" text-anchor="end" font-size="11" '
+                f'transform="rotate(-45 {x:.1f} {bottom + 16})">{escape(str(month))}</text>'
+            )
+
+        # 只标注最高与最低的月份
+        for index in sorted({amounts.index(max(amounts)), amounts.index(min(amounts))}):
+            parts.append(
+                f'<text x="{centers[index]:.1f}" y="{to_y(amounts[index]) - 10:.1f}" '
+                f'text-anchor="middle" font-size="10">¥{amounts[index]:.0f}</text>'
+            )
+
+        # 折线
+        parts.append(
+            f'<polyline points="{points}" fill="none" stroke="#2E86AB" stroke-width="2"/>'
+        )
+        for x, amount in zip(centers, amounts):
+            parts.append(f'<circle cx="{x:.1f}" cy="{to_y(amount):.1f}" r="4" fill="#2E86AB"/>')
+
+        # 平均线
+        avg_amount = sum(amounts) / len(amounts)
+        avg_y = to_y(avg_amount)
+        parts.append(
+            f'<line x1="{left}" y1="{avg_y:.1f}" x2="{right}" y2="{avg_y:.1f}" stroke="red" '
+            f'stroke-width="2" stroke-dasharray="8 4"/>'
+            f'<text x="{right}" y="{top - 10}" text-anchor="end" font-size="12" fill="red">'
+            f"平均消费: ¥{avg_amount:.2f}</text>"
+        )
+
+        # 坐标轴标题
+        parts.append(
+            f'<text x="{(left + right) / 2:.1f}" y="{height - 10}" text-anchor="middle" '
+            f'font-size="13" font-weight="bold">月份</text>'
+            f'<text x="20" y="{(top + bottom) / 2:.1f}" text-anchor="middle" font-size="13" '
+            f'font-weight="bold" transform="rotate(-90 20 {(top + bottom) / 2:.1f})">消费金额（元）</text>'
+        )
+
+        return self._save_svg("".join(parts), width, height, filename, inline)
+
+    def plot_platform_comparison(
+        self, platform_data: Dict, filename: str = "platform_comparison.svg", inline: bool = False
+    ) -> str:
+        """
+        绘制平台消费对比图
+
+        Args:
+            platform_data: 平台数据 {平台名: {amount: 金额}}
+            filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        # 准备数据
+        platforms = list(platform_data.keys())
+        amounts = [abs(platform_data[p]["amount"]) for p in platforms]
+
+        if not platforms:
+            return ""
+
+        width, height = 800, 480
+        left, right, top, bottom = 90, width - 30, 70, height - 60
+        max_value = max(amounts) * 1.15 or 1
+        slot = (right - left) / len(platforms)
+
+        parts = [self._title("各平台消费对比", width)]
+        parts.extend(self._value_grid(max_value, left, right, top, bottom))
+
+        for i, (platform_name, amount) in enumerate(zip(platforms, amounts)):
+            x = left + slot * (i + 0.5)
+            y = bottom - (bottom - top) * amount / max_value
+            color = self.BAR_COLORS[i % len(self.BAR_COLORS)]
+            parts.append(
+                f'<rect x="{x - slot * 0.4:.1f}" y="{y:.1f}" width="{slot * 0.8:.1f}" '
+                f'height="{bottom - y:.1f}" fill="{color}"/>'
+                f'<text x="{x:.1f}" y="{y - 6:.1f}" text-anchor="middle" font-size="13" '
+                f'font-weight="bold">¥{amount:.2f}</text>'
+                f'<text x="{x:.1f}" y="{bottom + 18}" text-anchor="middle" font-size="12">'
+                f"{escape(str(platform_name))}</text>"
+            )
+
+        # 坐标轴标题
+        parts.append(
+            f'<text x="{(left + right) / 2:.1f}" y="{height - 10}" text-anchor="middle" '
+            f'font-size="13" font-weight="bold">支付平台</text>'
+            f'<text x="20" y="{(top + bottom) / 2:.1f}" text-anchor="middle" font-size="13" '
+            f'font-weight="bold" transform="rotate(-90 20 {(top + bottom) / 2:.1f})">消费金额（元）</text>'
+        )
+
+        return self._save_svg("".join(parts), width, height, filename, inline)
+
+    def plot_top_merchants(
+        self,
+        merchants: list,
+        filename: str = "top_merchants.svg",
+        top_n: int = 10,
+        inline: bool = False,
+    ) -> str:
+        """
+        绘制消费最多的商户
+
+        Args:
+            merchants: 商户列表 [{"merchant": 名称, "amount": 金额}]
+            filename: 输出文件名
+            top_n: 显示前 N 个
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        if not merchants:
+            return ""
+
+        # 按金额取前 N 个（部分排序；传入的列表已排序时顺序不变）
+        top_merchants = heapq.nlargest(top_n, merchants, key=itemgetter("amount"))
+
+        # 准备数据
+        merchant_names = [m["merchant"][:15] + "..." if len(m["merchant"]) > 15 else m["merchant"]
+                          for m in top_merchants]
+        amounts = [m["amount"] for m in top_merchants]
+
+        row_height = 36
+        width = 1000
+        left, right, top = 220, width - 130, 60
+        height = top + row_height * len(amounts) + 50
+        max_value = max(amounts) or 1
+
+        parts = [self._title(f"消费最多的 {top_n} 个商户", width)]
+
+        for i, (name, amount) in enumerate(zip(merchant_names, amounts)):
+            y = top + row_height * i
+            bar_width = (right - left) * amount / max_value
+            parts.append(
+                f'<rect x="{left}" y="{y + 4}" width="{bar_width:.1f}" height="{row_height - 8}" '
+                f'fill="#F18F01"/>'
+                f'<text x="{left - 8}" y="{y + row_height / 2 + 4:.1f}" text-anchor="end" '
+                f'font-size="12">{escape(str(name))}</text>'
+                f'<text x="{left + bar_width + 6:.1f}" y="{y + row_height / 2 + 4:.1f}" '
+                f'font-size="11">¥{amount:.2f}</text>'
+            )
+
+        # 坐标轴标题
+        parts.append(
+            f'<text x="{(left + right) / 2:.1f}" y="{height - 12}" text-anchor="middle" '
+            f'font-size="13" font-weight="bold">消费金额（元）</text>'
+        )
+
+        return self._save_svg("".join(parts), width, height, filename, inline)
+
+    def plot_all_charts(self, analysis_result: Dict, inline: bool = False) -> Dict[str, str]:
+        """
+        生成所有图表
+
+        Args:
+            analysis_result: 分析结果
+            inline: 是否不写文件，返回可嵌入 HTML 的 data URI
+
+        Returns:
+            生成的图表文件路径字典（inline 时为 data URI 字典）
+        """
+        charts = {}
+
+        # 消费分类饼图
+        if analysis_result.get("by_category"):
+            charts["category_pie"] = self.plot_category_pie(
+                analysis_result["by_category"], inline=inline
+            )
+
+        # 月度消费趋势图
+        if analysis_result.get("by_month"):
+            charts["monthly_trend"] = self.plot_monthly_trend(
+                analysis_result["by_month"], inline=inline
+            )
+
+        # 平台消费对比图
+        if analysis_result.get("by_platform"):
+            charts["platform_comparison"] = self.plot_platform_comparison(
+                analysis_result["by_platform"], inline=inline
+            )
+
+        # 消费最多的商户
+        if analysis_result.get("top_merchants"):
+            charts["top_merchants"] = self.plot_top_merchants(
+                analysis_result["top_merchants"], inline=inline
+            )
+
+        return charts
@@ -1,18 +1,39 @@
 """可视化模块"""
 
-import matplotlib.pyplot as plt
+import base64
+import hashlib
+import heapq
+import io
+import json
+import multiprocessing
+
 import matplotlib
+
+# 只输出图片文件，使用非交互式的 Agg 后端，跳过 GUI 后端初始化
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
-import pandas as pd
+import numpy as np
+from PIL import Image
 from typing import Dict, Optional
 import os
 import platform
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 
 
-def _setup_chinese_font():
-    """配置中文字体"""
+@lru_cache(maxsize=None)
+def _resolve_chinese_fonts() -> tuple:
+    """
+    确定要优先使用的中文字体（只查找一次系统字体，结果缓存）
+
+    Returns:
+        需要加在 font.sans-serif 最前面的字体名
+    """
     # 获取系统可用字体
-    system_fonts = [f.name for f in fm.fontManager.ttflist]
+    system_fonts = {f.name for f in fm.fontManager.ttflist}
 
     # 定义常见中文字体列表（按优先级）
     chinese_fonts = []
@@ -47,40 +68,65 @@ def _setup_chinese_font():
         ]
 
     # 找到第一个可用的中文字体
-    available_font = None
-    for font in chinese_fonts:
-        if font in system_fonts:
-            available_font = font
-            break
+    available_font = next((font for font in chinese_fonts if font in system_fonts), None)
 
-    # 如果没有找到中文字体，尝试直接设置
     if available_font:
-        matplotlib.rcParams["font.sans-serif"] = [available_font] + matplotlib.rcParams["font.sans-serif"]
         print(f"✓ 使用中文字体: {available_font}")
-    else:
-        print("⚠ 警告: 未找到合适的中文字体，图表可能无法正确显示中文")
-        print(f"  系统可用字体: {len(system_fonts)} 个")
-        # 仍然尝试设置常见字体
-        matplotlib.rcParams["font.sans-serif"] = chinese_fonts + matplotlib.rcParams["font.sans-serif"]
+        return (available_font,)
 
-    matplotlib.rcParams["axes.unicode_minus"] = False  # 解决负号显示问题
+    # 如果没有找到中文字体，仍然尝试设置常见字体
+    print("⚠ 警告: 未找到合适的中文字体，图表可能无法正确显示中文")
+    print(f"  系统可用字体: {len(system_fonts)} 个")
+    return tuple(chinese_fonts)
 
 
-# 初始化时设置中文字体
-_setup_chinese_font()
+def _setup_chinese_font():
+    """配置中文字体"""
+    matplotlib.rcParams["font.sans-serif"] = list(_resolve_chinese_fonts()) + matplotlib.rcParams["font.sans-serif"]
+    matplotlib.rcParams["axes.unicode_minus"] = False  # 解决负号显示问题
+
 
 
 class Visualizer:
     """图表生成器"""
 
-    def __init__(self, output_dir: str = "data/output"):
+    # 图表分辨率：报告中图片按容器宽度缩放显示，150 DPI 已足够清晰
+    CHART_DPI = 150
+
+    # 有损图片格式的编码参数：编码远快于 PNG 的 deflate，代价是文字边缘略有损失
+    LOSSY_OPTIONS = {
+        "webp": {"quality": 85, "method": 0},
+        "jpg": {"quality": 85},
+    }
+
+    # 支持的图片格式 -> MIME 类型
+    MIME_TYPES = {"png": "image/png", "webp": "image/webp", "jpg": "image/jpeg"}
+
+    # 商户图表默认显示的商户数
+    TOP_MERCHANT_COUNT = 10
+
+    # PNG 文本块中记录图表输入摘要的字段名
+    CACHE_KEY_FIELD = "bill_analysis data hash"
+
+    def __init__(
+        self, output_dir: str = "data/output", image_format: str = "png", parallel: bool = False
+    ):
         """
         初始化可视化器
 
         Args:
             output_dir: 输出目录
+            image_format: 图片格式，"png"（默认，无损）、"webp" 或 "jpg"（有损，编码更快）
+            parallel: 是否允许用进程池并行绘制多个图表（只在 fork 启动方式下生效）
         """
+        if image_format not in self.MIME_TYPES:
+            raise ValueError(f"不支持的图片格式: {image_format}")
+
         self.output_dir = output_dir
+        self.image_format = image_format
+        self.parallel = parallel
+        # PNG 使用 Pillow 的默认编码参数
+        self._save_options = self.LOSSY_OPTIONS.get(image_format)
         os.makedirs(output_dir, exist_ok=True)
 
         # 设置样式（在样式设置后重新配置字体）
@@ -93,29 +139,139 @@ class Visualizer:
         # 重新确保中文字体设置（样式可能会覆盖）
         _setup_chinese_font()
 
-    def plot_category_pie(self, category_data: Dict, filename: str = "category_pie.png") -> str:
+    def _cache_key(self, method_name: str, *args) -> str:
         """
-        绘制消费分类饼图
+        计算图表输入的摘要（绘图方法、数据与输出参数都相同时图表不变）
+
+        Args:
+            method_name: 绘图方法名
+            *args: 影响图表内容的参数
+
+        Returns:
+            十六进制摘要
+        """
+        payload = json.dumps(
+            [method_name, args, self.CHART_DPI, self.image_format, self._save_options],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _output_path(self, filename: str) -> str:
+        """
+        获取图表输出路径（扩展名与图片格式一致）
 
         Args:
-            category_data: 分类数据 {分类名: {amount: 金额}}
             filename: 输出文件名
 
         Returns:
             输出文件完整路径
         """
-        # 准备数据
-        categories = []
-        amounts = []
+        return os.path.join(self.output_dir, f"{os.path.splitext(filename)[0]}.{self.image_format}")
 
-        for category, stats in category_data.items():
-            if stats["amount"] > 0:
-                categories.append(category)
-                amounts.append(stats["amount"])
+    def _cached_chart(self, filename: str, cache_key: str) -> str:
+        """
+        查找输入未变、可直接复用的已有图表
+
+        Args:
+            filename: 输出文件名
+            cache_key: 图表输入的摘要
+
+        Returns:
+            已有图片记录的摘要与 cache_key 相同时返回其完整路径，否则返回空字符串
+        """
+        output_path = self._output_path(filename)
+        try:
+            # 只读取文件头与文本块，不解码像素（只有 PNG 会记录摘要）
+            with Image.open(output_path) as image:
+                if image.info.get(self.CACHE_KEY_FIELD) == cache_key:
+                    return output_path
+        except OSError:
+            pass
+        return ""
+
+    def _save_figure(
+        self, fig, filename: str, inline: bool = False, cache_key: Optional[str] = None
+    ) -> str:
+        """
+        保存图表并关闭图形
+
+        Args:
+            fig: 要保存的图形
+            filename: 输出文件名
+            inline: 是否不写文件，在内存中编码并返回 base64 data URI
+            cache_key: 写入 PNG 文本块的图表输入摘要，供下次生成时判断能否复用
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        try:
+            if inline:
+                buffer = io.BytesIO()
+                fig.savefig(
+                    buffer,
+                    format=self.image_format,
+                    dpi=self.CHART_DPI,
+                    pil_kwargs=self._save_options,
+                )
+                encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+                return f"data:{self.MIME_TYPES[self.image_format]};base64,{encoded}"
+
+            output_path = self._output_path(filename)
+            # 图片元数据只有 PNG 支持
+            metadata = (
+                {self.CACHE_KEY_FIELD: cache_key}
+                if cache_key and self.image_format == "png"
+                else None
+            )
+            fig.savefig(
+                output_path, dpi=self.CHART_DPI, pil_kwargs=self._save_options, metadata=metadata
+            )
+            return output_path
+        finally:
+            plt.close(fig)
+
+    def plot_category_pie(
+        self,
+        category_data: Dict,
+        filename: str = "category_pie.png",
+        inline: bool = False,
+        cache_key: Optional[str] = None,
+    ) -> str:
+        """
+        绘制消费分类饼图
+
+        Args:
+            category_data: 分类数据 {分类名: {amount: 金额}}
+            filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+            cache_key: 调用方已算好并确认未命中缓存的图表输入摘要（传入时不再重复检查缓存）
+
+        Returns:
+            输出文件完整路径（inline 时为 data URI）
+        """
+        # 准备数据：金额一次取成数组，只保留金额为正的分类
+        all_categories = list(category_data.keys())
+        all_amounts = np.fromiter(
+            (stats["amount"] for stats in category_data.values()),
+            dtype=np.float64,
+            count=len(all_categories),
+        )
+        positive = all_amounts > 0
+        categories = [category for category, keep in zip(all_categories, positive) if keep]
+        amounts = all_amounts[positive]
 
         if not categories:
             return ""
 
+        # 输入未变且图片已存在时直接复用
+        if cache_key is None and not inline:
+            cache_key = self._cache_key("plot_category_pie", category_data)
+            cached = self._cached_chart(filename, cache_key)
+            if cached:
+                return cached
+
         # 创建饼图
         fig, ax = plt.subplots(figsize=(12, 8))
 
@@ -140,7 +296,7 @@ class Visualizer:
         # 添加图例
         ax.legend(
             wedges,
-            [f"{cat}: ¥{amt:.2f}" for cat, amt in zip(categories, amounts)],
+            list(map("{}: ¥{:.2f}".format, categories, amounts)),
             title="消费金额",
             loc="center left",
             bbox_to_anchor=(1, 0, 0.5, 1),
@@ -149,30 +305,45 @@ class Visualizer:
         plt.tight_layout()
 
         # 保存图片
-        output_path = os.path.join(self.output_dir, filename)
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
-
-        return output_path
-
-    def plot_monthly_trend(self, monthly_data: Dict, filename: str = "monthly_trend.png") -> str:
+        return self._save_figure(fig, filename, inline, cache_key)
+
+    def plot_monthly_trend(
+        self,
+        monthly_data: Dict,
+        filename: str = "monthly_trend.png",
+        inline: bool = False,
+        cache_key: Optional[str] = None,
+    ) -> str:
         """
         绘制月度消费趋势图
 
         Args:
             monthly_data: 月度数据 {年月: {amount: 金额}}
             filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+            cache_key: 调用方已算好并确认未命中缓存的图表输入摘要（传入时不再重复检查缓存）
 
         Returns:
-            输出文件完整路径
+            输出文件完整路径（inline 时为 data URI）
         """
         # 准备数据
         months = sorted(monthly_data.keys())
-        amounts = [abs(monthly_data[m]["amount"]) for m in months]
+        amounts = np.abs(
+            np.fromiter(
+                (monthly_data[m]["amount"] for m in months), dtype=np.float64, count=len(months)
+            )
+        )
 
         if not months:
             return ""
 
+        # 输入未变且图片已存在时直接复用
+        if cache_key is None and not inline:
+            cache_key = self._cache_key("plot_monthly_trend", monthly_data)
+            cached = self._cached_chart(filename, cache_key)
+            if cached:
+                return cached
+
         # 创建折线图
         fig, ax = plt.subplots(figsize=(14, 7))
 
@@ -190,16 +361,14 @@ class Visualizer:
         # 添加填充
         ax.fill_between(months, amounts, alpha=0.3, color="#2E86AB")
 
-        # 添加柱状图
-        bars = ax.bar(months, amounts, alpha=0.5, color="#A23B72")
-
-        # 标注数值
-        for bar, amount in zip(bars, amounts):
-            height = bar.get_height()
-            ax.text(
-                bar.get_x() + bar.get_width() / 2.0,
-                height,
-                f"¥{amount:.0f}",
+        # 折线与填充已经表达了各月金额，只标注最高与最低的月份
+        # （分类坐标轴上第 i 个月份位于 x = i）
+        for index in sorted({int(amounts.argmax()), int(amounts.argmin())}):
+            ax.annotate(
+                f"¥{amounts[index]:.0f}",
+                xy=(index, amounts[index]),
+                xytext=(0, 8),
+                textcoords="offset points",
                 ha="center",
                 va="bottom",
                 fontsize=9,
@@ -216,7 +385,7 @@ class Visualizer:
         ax.grid(True, alpha=0.3, linestyle="--")
 
         # 添加平均线
-        avg_amount = sum(amounts) / len(amounts)
+        avg_amount = amounts.mean()
         ax.axhline(
             y=avg_amount,
             color="red",
@@ -230,14 +399,14 @@ class Visualizer:
         plt.tight_layout()
 
         # 保存图片
-        output_path = os.path.join(self.output_dir, filename)
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
-
-        return output_path
+        return self._save_figure(fig, filename, inline, cache_key)
 
     def plot_platform_comparison(
-        self, platform_data: Dict, filename: str = "platform_comparison.png"
+        self,
+        platform_data: Dict,
+        filename: str = "platform_comparison.png",
+        inline: bool = False,
+        cache_key: Optional[str] = None,
     ) -> str:
         """
         绘制平台消费对比图
@@ -245,17 +414,32 @@ class Visualizer:
         Args:
             platform_data: 平台数据 {平台名: {amount: 金额}}
             filename: 输出文件名
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+            cache_key: 调用方已算好并确认未命中缓存的图表输入摘要（传入时不再重复检查缓存）
 
         Returns:
-            输出文件完整路径
+            输出文件完整路径（inline 时为 data URI）
         """
         # 准备数据
         platforms = list(platform_data.keys())
-        amounts = [abs(platform_data[p]["amount"]) for p in platforms]
+        amounts = np.abs(
+            np.fromiter(
+                (platform_data[p]["amount"] for p in platforms),
+                dtype=np.float64,
+                count=len(platforms),
+            )
+        )
 
         if not platforms:
             return ""
 
+        # 输入未变且图片已存在时直接复用
+        if cache_key is None and not inline:
+            cache_key = self._cache_key("plot_platform_comparison", platform_data)
+            cached = self._cached_chart(filename, cache_key)
+            if cached:
+                return cached
+
         # 创建柱状图
         fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -264,17 +448,9 @@ class Visualizer:
         bars = ax.bar(platforms, amounts, color=colors)
 
         # 标注数值
-        for bar, amount in zip(bars, amounts):
-            height = bar.get_height()
-            ax.text(
-                bar.get_x() + bar.get_width() / 2.0,
-                height,
-                f"¥{amount:.2f}",
-                ha="center",
-                va="bottom",
-                fontsize=12,
-                fontweight="bold",
-            )
+        ax.bar_label(
+            bars, labels=[f"¥{amount:.2f}" for amount in amounts], fontsize=12, fontweight="bold"
+        )
 
         ax.set_xlabel("支付平台", fontsize=12, fontweight="bold")
         ax.set_ylabel("消费金额（元）", fontsize=12, fontweight="bold")
@@ -286,14 +462,15 @@ class Visualizer:
         plt.tight_layout()
 
         # 保存图片
-        output_path = os.path.join(self.output_dir, filename)
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
-
-        return output_path
+        return self._save_figure(fig, filename, inline, cache_key)
 
     def plot_top_merchants(
-        self, merchants: list, filename: str = "top_merchants.png", top_n: int = 10
+        self,
+        merchants: list,
+        filename: str = "top_merchants.png",
+        top_n: int = TOP_MERCHANT_COUNT,
+        inline: bool = False,
+        cache_key: Optional[str] = None,
     ) -> str:
         """
         绘制消费最多的商户
@@ -302,20 +479,31 @@ class Visualizer:
             merchants: 商户列表 [{"merchant": 名称, "amount": 金额}]
             filename: 输出文件名
             top_n: 显示前 N 个
+            inline: 是否不写文件，直接返回可嵌入 HTML 的 data URI
+            cache_key: 调用方已算好并确认未命中缓存的图表输入摘要（传入时不再重复检查缓存）
 
         Returns:
-            输出文件完整路径
+            输出文件完整路径（inline 时为 data URI）
         """
         if not merchants:
             return ""
 
-        # 取前 N 个
-        top_merchants = merchants[:top_n]
+        # 输入未变且图片已存在时直接复用
+        if cache_key is None and not inline:
+            cache_key = self._cache_key("plot_top_merchants", merchants, top_n)
+            cached = self._cached_chart(filename, cache_key)
+            if cached:
+                return cached
+
+        # 按金额取前 N 个（部分排序；传入的列表已排序时顺序不变）
+        top_merchants = heapq.nlargest(top_n, merchants, key=itemgetter("amount"))
 
         # 准备数据
         merchant_names = [m["merchant"][:15] + "..." if len(m["merchant"]) > 15 else m["merchant"]
                           for m in top_merchants]
-        amounts = [m["amount"] for m in top_merchants]
+        amounts = np.fromiter(
+            (m["amount"] for m in top_merchants), dtype=np.float64, count=len(top_merchants)
+        )
 
         # 创建水平柱状图
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -324,17 +512,10 @@ class Visualizer:
 
         bars = ax.barh(y_pos, amounts, color="#F18F01")
 
-        # 标注数值
-        for i, (bar, amount) in enumerate(zip(bars, amounts)):
-            width = bar.get_width()
-            ax.text(
-                width,
-                bar.get_y() + bar.get_height() / 2.0,
-                f" ¥{amount:.2f}",
-                ha="left",
-                va="center",
-                fontsize=10,
-            )
+        # 标注数值（水平柱状图的标签放在柱子右端）
+        ax.bar_label(
+            bars, labels=[f" ¥{amount:.2f}" for amount in amounts], label_type="edge", fontsize=10
+        )
 
         ax.set_yticks(y_pos)
         ax.set_yticklabels(merchant_names)
@@ -348,40 +529,129 @@ class Visualizer:
         plt.tight_layout()
 
         # 保存图片
-        output_path = os.path.join(self.output_dir, filename)
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
+        return self._save_figure(fig, filename, inline, cache_key)
 
-        return output_path
-
-    def plot_all_charts(self, analysis_result: Dict) -> Dict[str, str]:
+    def plot_all_charts(self, analysis_result: Dict, inline: bool = False) -> Dict[str, str]:
         """
         生成所有图表
 
         Args:
             analysis_result: 分析结果
+            inline: 是否不写文件，返回可嵌入 HTML 的 data URI
 
         Returns:
-            生成的图表文件路径字典
+            生成的图表文件路径字典（inline 时为 data URI 字典）
         """
-        charts = {}
+        # 各图表相互独立：(图表名, 绘图方法名, 数据, 其余参数)
+        tasks = []
 
         # 消费分类饼图
         if analysis_result.get("by_category"):
-            charts["category_pie"] = self.plot_category_pie(analysis_result["by_category"])
+            tasks.append(("category_pie", "plot_category_pie", analysis_result["by_category"], ()))
 
         # 月度消费趋势图
         if analysis_result.get("by_month"):
-            charts["monthly_trend"] = self.plot_monthly_trend(analysis_result["by_month"])
+            tasks.append(("monthly_trend", "plot_monthly_trend", analysis_result["by_month"], ()))
 
         # 平台消费对比图
         if analysis_result.get("by_platform"):
-            charts["platform_comparison"] = self.plot_platform_comparison(
-                analysis_result["by_platform"]
+            tasks.append(
+                (
+                    "platform_comparison",
+                    "plot_platform_comparison",
+                    analysis_result["by_platform"],
+                    (),
+                )
             )
 
         # 消费最多的商户
         if analysis_result.get("top_merchants"):
-            charts["top_merchants"] = self.plot_top_merchants(analysis_result["top_merchants"])
+            tasks.append(
+                (
+                    "top_merchants",
+                    "plot_top_merchants",
+                    analysis_result["top_merchants"],
+                    (self.TOP_MERCHANT_COUNT,),
+                )
+            )
 
-        return charts
+        # 先在当前进程中复用输入未变的图表，只绘制其余的图表
+        charts = {}
+        pending = []
+        for name, method, data, extra in tasks:
+            args = (data, f"{name}.png", *extra)
+            cache_key = None
+            if not inline:
+                cache_key = self._cache_key(method, data, *extra)
+                cached = self._cached_chart(args[1], cache_key)
+                if cached:
+                    charts[name] = cached
+                    continue
+            # 已算好的摘要随任务传给绘图方法，不再重复计算和检查
+            pending.append((name, method, args, cache_key))
+
+        # 默认依次绘制：spawn 启动方式（Windows 默认）下每个子进程都要重新导入 matplotlib、
+        # 查找字体，四个图表用进程池反而慢数倍
+        workers = min(len(pending), os.cpu_count() or 1)
+        # allow_none 避免在这里把启动方式固定下来；未设置时取平台默认的启动方式
+        start_method = (
+            multiprocessing.get_start_method(allow_none=True)
+            or multiprocessing.get_all_start_methods()[0]
+        )
+        if not self.parallel or workers < 2 or start_method != "fork":
+            for name, method, args, cache_key in pending:
+                charts[name] = getattr(self, method)(*args, inline=inline, cache_key=cache_key)
+        else:
+            # fork 出的子进程直接继承已导入的 matplotlib 与字体设置，多个图表并行渲染
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                futures = [
+                    (
+                        name,
+                        executor.submit(
+                            _render_chart,
+                            self.output_dir,
+                            method,
+                            args,
+                            inline,
+                            self.image_format,
+                            cache_key,
+                        ),
+                    )
+                    for name, method, args, cache_key in pending
+                ]
+            charts.update((name, future.result()) for name, future in futures)
+
+        # 按图表顺序返回
+        return {name: charts[name] for name, _, _, _ in tasks}
+
+
+def _render_chart(
+    output_dir: str,
+    method_name: str,
+    args: tuple,
+    inline: bool = False,
+    image_format: str = "png",
+    cache_key: Optional[str] = None,
+) -> str:
+    """
+    在子进程中绘制单个图表
+
+    子进程中重新创建 Visualizer，确保样式与中文字体设置生效（fork 出的子进程继承了
+    字体查找结果的缓存，不会重复查找）
+
+    Args:
+        output_dir: 输出目录
+        method_name: Visualizer 的绘图方法名
+        args: 绘图方法的位置参数（数据、输出文件名等）
+        inline: 是否返回 data URI 而不写文件
+        image_format: 图片格式
+        cache_key: 父进程已算好的图表输入摘要
+
+    Returns:
+        输出文件完整路径（inline 时为 data URI）
+    """
+    return getattr(Visualizer(output_dir, image_format), method_name)(
+        *args, inline=inline, cache_key=cache_key
+    )